@@ -0,0 +1,20 @@
+-- Migration: 010_raw_messages_notify.sql
+-- Description: NOTIFY raw_messages_new whenever rows land in raw_messages
+-- Rationale: eva-worker LISTENs on this channel and wakes immediately instead
+--            of polling every 10 seconds. The worker still wakes on a timeout,
+--            so a missed notification only delays processing, never loses it.
+
+CREATE OR REPLACE FUNCTION notify_raw_messages_new()
+RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('raw_messages_new', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level: one notification per INSERT, however many rows it carries
+DROP TRIGGER IF EXISTS trg_raw_messages_notify ON raw_messages;
+CREATE TRIGGER trg_raw_messages_notify
+    AFTER INSERT ON raw_messages
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_raw_messages_new();
@@ -0,0 +1,16 @@
+-- Migration: 011_paper_trades_open_covering_index.sql
+-- Description: Covering partial index for the open-position scans
+-- Rationale: check_paper_exits.py and paper_trade_updater.py both read only
+--            open positions, but the table keeps every closed trade forever.
+--            This index stays O(open positions) and carries the columns the
+--            exit check reads, so that scan can be answered index-only.
+--            signal_event_id needs no new index: UNIQUE(signal_event_id) from
+--            005_paper_trading_system.sql already backs the entry anti-join.
+--
+-- CONCURRENTLY avoids locking paper_trades against the daily writers; it
+-- cannot run inside a transaction block, so apply this file with plain psql.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_paper_trades_open_entry_date
+    ON paper_trades(entry_date)
+    INCLUDE (ticker, entry_price, current_price, position_size)
+    WHERE status = 'open';
@@ -75,6 +75,7 @@ class AppSettings(BaseSettings):
     # OpenAI
     openai_api_key: Optional[str] = None
     eva_model: str = "gpt-4o-mini"
+    extract_max_workers: int = 8  # Concurrent in-flight LLM requests per batch
 
     # Notifications
     ntfy_url: str = "http://eva_ntfy:80"
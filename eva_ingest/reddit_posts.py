@@ -37,6 +37,8 @@ DEFAULT_LIMIT = 25
 DEFAULT_RATE_LIMIT_SLEEP = 2  # seconds between subreddit fetches
 DEFAULT_EVA_API_URL = "http://eva-api:9080/intake/message"
 USER_AGENT = "EVA-Finance/1.0 (Reddit text post ingestion; boring and deterministic)"
+MIN_SELFTEXT_LENGTH = 10  # avoid one-word posts
+REMOVED_MARKERS = frozenset(("[removed]", "[deleted]"))
 
 # Set up logging
 logging.basicConfig(
@@ -123,19 +125,15 @@ class RedditPostProcessor:
         """
         selftext = post.get("selftext", "").strip()
 
-        # Must have selftext
-        if not selftext:
-            return False
+        # Must have real content: not removed/deleted, and long enough
+        # (the length check also rejects empty selftext)
+        return selftext not in REMOVED_MARKERS and len(selftext) >= MIN_SELFTEXT_LENGTH
 
-        # Filter out removed/deleted content
-        if selftext in ["[removed]", "[deleted]"]:
-            return False
-
-        # Must have minimum length (avoid one-word posts)
-        if len(selftext) < 10:
-            return False
-
-        return True
+    @classmethod
+    def filter_valid(cls, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the subset of posts that pass is_valid_text_post."""
+        is_valid = cls.is_valid_text_post
+        return [post for post in posts if is_valid(post)]
 
     @staticmethod
     def normalize_to_eva_format(post: Dict[str, Any]) -> Dict[str, Any]:
@@ -287,7 +285,7 @@ class RedditIngestionJob:
             self.stats["posts_fetched"] += len(posts)
 
             # Filter and process
-            valid_posts = [p for p in posts if self.processor.is_valid_text_post(p)]
+            valid_posts = self.processor.filter_valid(posts)
             filtered_count = len(posts) - len(valid_posts)
             self.stats["posts_filtered"] += filtered_count
 
@@ -1,8 +1,7 @@
 import os
-import json
 import logging
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, Json, execute_values, execute_batch
 
 # Google Trends cross-validation
 try:
@@ -13,12 +12,63 @@ try:
         get_metrics as get_trends_metrics
     )
     TRENDS_AVAILABLE = True
-except ImportError:
+    TRENDS_IMPORT_ERROR = None
+except ImportError as e:
     TRENDS_AVAILABLE = False
+    TRENDS_IMPORT_ERROR = e
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# Multi-row upsert of scored candidates; VALUES %s is filled by execute_values
+UPSERT_CONFIDENCE_SQL = """
+    INSERT INTO public.eva_confidence_v1 (
+        day, tag, brand,
+        acceleration_score, intent_score, spread_score, baseline_score, suppression_score,
+        final_confidence, band, gate_failed_reason, scoring_version, details
+    )
+    VALUES %s
+    ON CONFLICT (day, tag, brand, scoring_version)
+    DO UPDATE SET
+        acceleration_score = EXCLUDED.acceleration_score,
+        intent_score = EXCLUDED.intent_score,
+        spread_score = EXCLUDED.spread_score,
+        baseline_score = EXCLUDED.baseline_score,
+        suppression_score = EXCLUDED.suppression_score,
+        final_confidence = EXCLUDED.final_confidence,
+        band = EXCLUDED.band,
+        gate_failed_reason = EXCLUDED.gate_failed_reason,
+        details = EXCLUDED.details,
+        computed_at = now()
+"""
+
+# Signal events are written after the confidence upsert, in the same
+# transaction, so every event has its eva_confidence_v1 snapshot
+WATCHLIST_WARM_EVENT_SQL = """
+    INSERT INTO public.signal_events (event_type, tag, brand, day, severity, payload)
+    VALUES ('WATCHLIST_WARM', %s, %s, %s, 'warning',
+            jsonb_build_object(
+                'reason', %s,
+                'band', %s,
+                'gate_failed_reason', %s,
+                'final_confidence', %s,
+                'scores', jsonb_build_object(
+                    'acceleration', %s,
+                    'intent', %s,
+                    'spread', %s
+                ),
+                'scoring_version', 'v1'
+            ))
+    ON CONFLICT DO NOTHING;
+"""
+
+RECOMMENDATION_ELIGIBLE_EVENT_SQL = """
+    INSERT INTO public.signal_events (event_type, tag, brand, day, severity, payload)
+    VALUES ('RECOMMENDATION_ELIGIBLE', %s, %s, %s, 'critical',
+            jsonb_build_object('final_confidence', %s, 'scoring_version', 'v1'))
+    ON CONFLICT DO NOTHING;
+"""
+
 
 def clamp(x: float, lo: float = 0.0, hi: float = 1.0) -> float:
     return max(lo, min(hi, x))
@@ -105,11 +155,54 @@ def eva_v1_final(accel, intent, spread, baseline, suppression) -> dict:
     return {"band": band, "reason": None, "final": float(round(final, 4))}
 
 
+def score_candidate(r: dict) -> dict:
+    """Compute the v1 component scores and band for one candidate row."""
+    delta_pct = float(r["delta_pct"])
+    msg_count = int(r["msg_count"])
+    source_count = int(r["source_count"])
+    platform_count = int(r["platform_count"])
+
+    accel = map_delta_pct_to_accel(delta_pct)
+    intent = map_action_intent_to_intent(r["action_intent_rate"])
+
+    # ✅ Upgraded spread logic (still conservative)
+    spread_raw = max(
+        (source_count - 1) / 3.0,
+        (platform_count - 1) / 3.0
+    )
+    spread = clamp(spread_raw)
+
+    suppression = map_suppression(r["meme_risk"])
+    baseline = baseline_score_from_msg_count(msg_count)
+
+    result = eva_v1_final(accel, intent, spread, baseline, suppression)
+    return {
+        "delta_pct": delta_pct,
+        "msg_count": msg_count,
+        "source_count": source_count,
+        "platform_count": platform_count,
+        "accel": accel,
+        "intent": intent,
+        "spread_raw": spread_raw,
+        "spread": spread,
+        "suppression": suppression,
+        "baseline": baseline,
+        **result,
+    }
+
+
+def get_trends_validator() -> "GoogleTrendsValidator":
+    """Return the process-wide validator (cached for efficiency)."""
+    if not hasattr(main, '_trends_validator'):
+        cache_hours = int(os.getenv("GOOGLE_TRENDS_CACHE_HOURS", "24"))
+        main._trends_validator = GoogleTrendsValidator(cache_ttl_hours=cache_hours)
+    return main._trends_validator
+
+
 def main():
     db_url = os.environ.get("DATABASE_URL") or "postgres://eva:eva_password_change_me@db:5432/eva_finance"
 
     conn = psycopg2.connect(db_url)
-    conn.autocommit = True
 
     with conn.cursor(cursor_factory=RealDictCursor) as cur:
         # Score recent candidates (Phase 0: include last 7 days for validation)
@@ -124,57 +217,58 @@ def main():
         print("No candidates for today in v_eva_candidate_brand_signals_v1.")
         return
 
-    with conn.cursor() as cur:
-        for r in rows:
-            day = r["day"]
-            tag = r["tag"]
-            brand = r["brand"]
-
-            # Skip candidates with NULL or empty brand/tag (not actionable for recommendations)
-            if brand is None or brand == '' or tag is None or tag == '':
-                continue
+    TRENDS_ENABLED = os.getenv("GOOGLE_TRENDS_ENABLED", "true").lower() == "true"
+    TRENDS_MIN_CONFIDENCE = float(os.getenv("GOOGLE_TRENDS_MIN_CONFIDENCE", "0.60"))
 
-            delta_pct = float(r["delta_pct"])
-            msg_count = int(r["msg_count"])
-            source_count = int(r["source_count"])
-            platform_count = int(r["platform_count"])
+    if TRENDS_ENABLED and not TRENDS_AVAILABLE:
+        logger.warning(
+            f"[TRENDS-VALIDATION] GOOGLE_TRENDS_ENABLED is set but google_trends failed to import "
+            f"({TRENDS_IMPORT_ERROR}); Trends validation is disabled for this run"
+        )
 
-            accel = map_delta_pct_to_accel(delta_pct)
-            intent = map_action_intent_to_intent(r["action_intent_rate"])
+    # Skip candidates with NULL or empty brand/tag (not actionable for recommendations)
+    scored = [
+        (r, score_candidate(r))
+        for r in rows
+        if r["brand"] not in (None, '') and r["tag"] not in (None, '')
+    ]
 
-            # ✅ Upgraded spread logic (still conservative)
-            spread_raw = max(
-                (source_count - 1) / 3.0,
-                (platform_count - 1) / 3.0
-            )
-            spread = clamp(spread_raw)
+    confidence_rows = {}
+    warm_events = []
+    eligible_events = []
 
-            suppression = map_suppression(r["meme_risk"])
-            baseline = baseline_score_from_msg_count(msg_count)
+    with conn.cursor() as cur:
+        for r, s in scored:
+            day = r["day"]
+            tag = r["tag"]
+            brand = r["brand"]
 
-            result = eva_v1_final(accel, intent, spread, baseline, suppression)
-            band = result["band"]
-            gate_reason = result["reason"]
-            final = result["final"]
+            delta_pct = s["delta_pct"]
+            msg_count = s["msg_count"]
+            source_count = s["source_count"]
+            platform_count = s["platform_count"]
+            accel = s["accel"]
+            intent = s["intent"]
+            spread_raw = s["spread_raw"]
+            spread = s["spread"]
+            suppression = s["suppression"]
+            baseline = s["baseline"]
+            band = s["band"]
+            gate_reason = s["reason"]
+            final = s["final"]
 
             # Google Trends cross-validation (only for high-confidence signals)
             base_confidence = final  # Store original before adjustment
             trends_validated = False
             trends_data = None
 
-            TRENDS_ENABLED = os.getenv("GOOGLE_TRENDS_ENABLED", "true").lower() == "true"
-            TRENDS_MIN_CONFIDENCE = float(os.getenv("GOOGLE_TRENDS_MIN_CONFIDENCE", "0.60"))
-
             if TRENDS_AVAILABLE and TRENDS_ENABLED and band == "HIGH" and final >= TRENDS_MIN_CONFIDENCE:
+                # A failed validation insert must not abort the run's transaction
+                cur.execute("SAVEPOINT trends_validation")
                 try:
                     logger.info(f"[TRENDS-VALIDATION] Checking Google Trends for {brand} (confidence={final:.4f})")
 
-                    # Initialize validator (cached for efficiency)
-                    if not hasattr(main, '_trends_validator'):
-                        cache_hours = int(os.getenv("GOOGLE_TRENDS_CACHE_HOURS", "24"))
-                        main._trends_validator = GoogleTrendsValidator(cache_ttl_hours=cache_hours)
-
-                    validator = main._trends_validator
+                    validator = get_trends_validator()
 
                     # Use non-blocking validation (returns pending on rate limits)
                     trends_result = validate_brand_non_blocking(brand, validator=validator)
@@ -194,7 +288,7 @@ def main():
                             validates_signal, confidence_boost, query_term, timeframe,
                             raw_data, error_message
                         )
-                        VALUES (%s, NOW(), %s, %s, %s, %s, %s, %s, %s::jsonb, %s)
+                        VALUES (%s, NOW(), %s, %s, %s, %s, %s, %s, %s, %s)
                     """, (
                         brand,
                         trends_result['search_interest'],
@@ -203,7 +297,7 @@ def main():
                         confidence_boost,
                         trends_result['query_term'],
                         trends_result['timeframe'],
-                        json.dumps(trends_result['raw_data']) if trends_result['raw_data'] else None,
+                        Json(trends_result['raw_data']) if trends_result['raw_data'] else None,
                         trends_result['error_message']
                     ))
 
@@ -240,30 +334,17 @@ def main():
                             band = "SUPPRESSED"
                             gate_reason = "TRENDS_PENALTY_BELOW_THRESHOLD"
 
+                    cur.execute("RELEASE SAVEPOINT trends_validation")
+
                 except Exception as e:
+                    cur.execute("ROLLBACK TO SAVEPOINT trends_validation")
                     logger.error(f"[TRENDS-VALIDATION] ✗ Failed for {brand}: {e}")
                     # Continue with original confidence on error (conservative)
 
             # Emit WATCHLIST breadcrumbs for "warming up" signals
             warm, warm_reason = is_watchlist_warm(accel, intent, spread)
             if band != "HIGH" and warm:
-                cur.execute("""
-                    INSERT INTO public.signal_events (event_type, tag, brand, day, severity, payload)
-                    VALUES ('WATCHLIST_WARM', %s, %s, %s, 'warning',
-                            jsonb_build_object(
-                                'reason', %s,
-                                'band', %s,
-                                'gate_failed_reason', %s,
-                                'final_confidence', %s,
-                                'scores', jsonb_build_object(
-                                    'acceleration', %s,
-                                    'intent', %s,
-                                    'spread', %s
-                                ),
-                                'scoring_version', 'v1'
-                            ))
-                    ON CONFLICT DO NOTHING;
-                """, (
+                warm_events.append((
                     tag, brand, day,
                     warm_reason, band, gate_reason, final,
                     accel, intent, spread
@@ -290,39 +371,30 @@ def main():
                 "google_trends": trends_data  # Include trends validation data
             }
 
-            cur.execute("""
-                INSERT INTO public.eva_confidence_v1 (
-                    day, tag, brand,
-                    acceleration_score, intent_score, spread_score, baseline_score, suppression_score,
-                    final_confidence, band, gate_failed_reason, scoring_version, details
-                )
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,'v1',%s::jsonb)
-                ON CONFLICT (day, tag, brand, scoring_version)
-                DO UPDATE SET
-                    acceleration_score = EXCLUDED.acceleration_score,
-                    intent_score = EXCLUDED.intent_score,
-                    spread_score = EXCLUDED.spread_score,
-                    baseline_score = EXCLUDED.baseline_score,
-                    suppression_score = EXCLUDED.suppression_score,
-                    final_confidence = EXCLUDED.final_confidence,
-                    band = EXCLUDED.band,
-                    gate_failed_reason = EXCLUDED.gate_failed_reason,
-                    details = EXCLUDED.details,
-                    computed_at = now();
-            """, (
+            # Upserted together after the loop; keyed so a repeated
+            # (day, tag, brand) can't hit the same row twice in one statement
+            confidence_rows[(day, tag, brand)] = (
                 day, tag, brand,
                 accel, intent, spread, baseline, suppression,
-                final, band, gate_reason, json.dumps(details)
-            ))
+                final, band, gate_reason, Json(details)
+            )
 
             # Emit only when HIGH (low frequency)
             if band == "HIGH":
-                cur.execute("""
-                    INSERT INTO public.signal_events (event_type, tag, brand, day, severity, payload)
-                    VALUES ('RECOMMENDATION_ELIGIBLE', %s, %s, %s, 'critical',
-                            jsonb_build_object('final_confidence', %s, 'scoring_version', 'v1'))
-                    ON CONFLICT DO NOTHING;
-                """, (tag, brand, day, final))
+                eligible_events.append((tag, brand, day, final))
+
+        # Snapshots first, then the events that reference them; one commit
+        # makes both visible to reco_runner together
+        execute_values(
+            cur, UPSERT_CONFIDENCE_SQL, list(confidence_rows.values()),
+            template="(%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,'v1',%s)", page_size=1000
+        )
+        if warm_events:
+            execute_batch(cur, WATCHLIST_WARM_EVENT_SQL, warm_events)
+        if eligible_events:
+            execute_batch(cur, RECOMMENDATION_ELIGIBLE_EVENT_SQL, eligible_events)
+
+    conn.commit()
 
     print(f"Scored {len(rows)} candidate(s) into eva_confidence_v1.")
 
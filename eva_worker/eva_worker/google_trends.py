@@ -16,9 +16,9 @@ import os
 import logging
 import time
 import random
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
+from cachetools import TLRUCache
 
 logger = logging.getLogger(__name__)
 
@@ -41,54 +41,52 @@ _metrics = {
     'retry_attempts': 0,
 }
 
-# In-memory cache (no Redis infrastructure)
-_trends_cache: Dict[str, Dict] = {}
+# Upper bound on cached brands so long worker runs can't grow the cache unbounded
+CACHE_MAX_ENTRIES = int(os.getenv("GOOGLE_TRENDS_CACHE_MAX_ENTRIES", "10000"))
+
+
+def _entry_expiry(_key: str, entry: Tuple[Dict, float], now: float) -> float:
+    """Per-entry expiry: each entry carries the TTL of the TrendsCache that set it."""
+    return now + entry[1]
+
+
+# In-memory cache (no Redis infrastructure), shared by all TrendsCache
+# instances. TLRUCache evicts expired entries in expiry order and falls back
+# to LRU eviction once CACHE_MAX_ENTRIES is reached.
+_trends_cache: TLRUCache = TLRUCache(maxsize=CACHE_MAX_ENTRIES, ttu=_entry_expiry)
 
 
 class TrendsCache:
     """
     In-memory cache for Google Trends data with TTL expiration.
 
-    Uses simple dict storage since Redis infrastructure is not available.
+    Backed by a bounded cachetools TLRUCache since Redis infrastructure is not available.
     Cache key format: brand name (lowercase)
     """
 
-    def __init__(self, ttl_hours: int = 24):
+    def __init__(self, ttl_hours: float = 24):
         self.ttl_hours = ttl_hours
+        self._ttl_seconds = ttl_hours * 3600
         logger.info(f"[TRENDS-CACHE] Initialized with {ttl_hours}h TTL")
 
     def get(self, brand: str) -> Optional[Dict]:
         """Retrieve cached validation result if not expired."""
         brand_key = brand.lower().strip()
 
-        if brand_key not in _trends_cache:
+        entry = _trends_cache.get(brand_key)
+        if entry is None:
             logger.debug(f"[TRENDS-CACHE] MISS: {brand}")
             return None
 
-        entry = _trends_cache[brand_key]
-        expires_at = entry['expires_at']
-
-        if datetime.now() >= expires_at:
-            # Expired - remove from cache
-            del _trends_cache[brand_key]
-            logger.debug(f"[TRENDS-CACHE] EXPIRED: {brand}")
-            return None
-
-        logger.info(f"[TRENDS-CACHE] HIT: {brand} (expires {expires_at.strftime('%Y-%m-%d %H:%M')})")
-        return entry['data']
+        logger.info(f"[TRENDS-CACHE] HIT: {brand}")
+        return entry[0]
 
     def set(self, brand: str, data: Dict):
         """Store validation result with TTL expiration."""
         brand_key = brand.lower().strip()
-        expires_at = datetime.now() + timedelta(hours=self.ttl_hours)
-
-        _trends_cache[brand_key] = {
-            'data': data,
-            'expires_at': expires_at,
-            'cached_at': datetime.now()
-        }
+        _trends_cache[brand_key] = (data, self._ttl_seconds)
 
-        logger.info(f"[TRENDS-CACHE] SET: {brand} (expires {expires_at.strftime('%Y-%m-%d %H:%M')})")
+        logger.info(f"[TRENDS-CACHE] SET: {brand} (ttl {self.ttl_hours}h)")
 
     def clear(self):
         """Clear entire cache (for testing)."""
@@ -96,7 +94,8 @@ class TrendsCache:
         logger.info("[TRENDS-CACHE] Cleared all entries")
 
     def size(self) -> int:
-        """Return number of cached entries."""
+        """Return number of unexpired cached entries."""
+        _trends_cache.expire()
         return len(_trends_cache)
 
 
@@ -206,15 +205,19 @@ class GoogleTrendsValidator:
         logger.info("[TRENDS] Resetting pytrends session...")
         self._init_pytrends()
 
-    def _fetch_with_retry(self, brand: str, timeframe: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    def _fetch_with_retry(self, kw_list: List[str], timeframe: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
         """
         Fetch Google Trends data with exponential backoff retry on rate limits.
 
+        Args:
+            kw_list: Keywords for one payload, one column each
+
         Returns:
             Tuple of (DataFrame or None, error_message or None)
         """
         global _last_request_time
         last_error = None
+        brand = ", ".join(kw_list)  # For log messages
 
         for attempt in range(MAX_RETRIES + 1):  # +1 for initial attempt
             try:
@@ -230,7 +233,7 @@ class GoogleTrendsValidator:
                 _last_request_time = time.time()
 
                 self.pytrends.build_payload(
-                    kw_list=[brand],
+                    kw_list=kw_list,
                     timeframe=timeframe,
                     geo='US',
                     gprop=''
@@ -318,11 +321,21 @@ class GoogleTrendsValidator:
         # Fetch trends data with retry logic
         logger.info(f"[TRENDS] Fetching data for '{brand}' ({timeframe})")
 
-        df, error_msg = self._fetch_with_retry(brand, timeframe)
+        df, error_msg = self._fetch_with_retry([brand], timeframe)
 
         if error_msg:
             return self._error_result(brand, timeframe, error_msg)
 
+        result = self._analyze_brand(df, brand, timeframe)
+
+        # Cache successful result
+        if use_cache and result['error_message'] is None:
+            self.cache.set(brand, result)
+
+        return result
+
+    def _analyze_brand(self, df: Optional[pd.DataFrame], brand: str, timeframe: str) -> Dict:
+        """Turn one brand's column of a pytrends response into a validation result."""
         if df is None or df.empty or brand not in df.columns:
             logger.warning(f"[TRENDS] No data returned for '{brand}'")
             return self._error_result(brand, timeframe, f"No search data for '{brand}'")
@@ -356,10 +369,6 @@ class GoogleTrendsValidator:
             f"validates={validates_signal}"
         )
 
-        # Cache successful result
-        if use_cache:
-            self.cache.set(brand, result)
-
         return result
 
     def _calculate_recent_interest(self, df: pd.DataFrame, brand: str) -> float:
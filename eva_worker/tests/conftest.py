@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration for the worker test suite.
+
+Tests run inside the worker image, where the service code lives at /app.
+Putting it on sys.path once here keeps the test modules free of path setup.
+"""
+
+import sys
+
+if '/app' not in sys.path:
+    sys.path.insert(0, '/app')
@@ -11,10 +11,10 @@ import pytest
 import pandas as pd
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch, MagicMock
+from cachetools import TLRUCache
 
-# Import modules under test
-import sys
-sys.path.insert(0, '/app')
+# Import modules under test (conftest.py puts /app on sys.path)
+from eva_worker import google_trends
 from eva_worker.google_trends import (
     GoogleTrendsValidator,
     TrendsCache,
@@ -26,11 +26,9 @@ from eva_worker.google_trends import (
 # FIXTURES
 # ============================================================================
 
-@pytest.fixture
-def mock_pytrends():
-    """Mock pytrends TrendReq object with sample data."""
-    mock = MagicMock()
-
+@pytest.fixture(scope="session")
+def mock_pytrends_data():
+    """Sample trends DataFrames, built once per session (tests only read them)."""
     # Generate sample date range (90 days)
     dates = pd.date_range(end=datetime.now(), periods=90, freq='D')
 
@@ -52,9 +50,7 @@ def mock_pytrends():
 
     df_empty = pd.DataFrame()
 
-    mock.interest_over_time.side_effect = lambda: df_rising
-
-    return mock, {
+    return {
         'rising': df_rising,
         'stable': df_stable,
         'falling': df_falling,
@@ -63,8 +59,17 @@ def mock_pytrends():
 
 
 @pytest.fixture
+def mock_pytrends(mock_pytrends_data):
+    """Mock pytrends TrendReq object with sample data (fresh mock per test)."""
+    mock = MagicMock()
+    mock.interest_over_time.side_effect = lambda: mock_pytrends_data['rising']
+
+    return mock, mock_pytrends_data
+
+
+@pytest.fixture(scope="module")
 def validator():
-    """Create GoogleTrendsValidator instance."""
+    """Create GoogleTrendsValidator instance (config is constant, so shared per module)."""
     return GoogleTrendsValidator(cache_ttl_hours=1)
 
 
@@ -97,17 +102,24 @@ def test_cache_hit(cache):
     assert result['confidence_boost'] == 0.10
 
 
-def test_cache_expiration(cache):
+def test_cache_expiration(monkeypatch):
     """Test cache expires after TTL."""
+    # Swap in a store driven by a virtual clock so expiry needs no real sleep
+    clock = [0.0]
+    monkeypatch.setattr(
+        google_trends,
+        '_trends_cache',
+        TLRUCache(maxsize=16, ttu=google_trends._entry_expiry, timer=lambda: clock[0])
+    )
+
     cache_short = TrendsCache(ttl_hours=0.001)  # ~3.6 seconds
     cache_short.set('Nike', {'data': 'test'})
 
     # Immediate retrieval should work
     assert cache_short.get('Nike') is not None
 
-    # Wait for expiration
-    import time
-    time.sleep(4)
+    # Advance past expiration
+    clock[0] += 4
 
     # Should be expired now
     assert cache_short.get('Nike') is None
@@ -333,6 +345,37 @@ def test_cache_bypass(validator, mock_pytrends):
         assert mock_trends.build_payload.call_count == 2  # Called again
 
 
+def test_weak_brand_not_scaled_by_dominant(validator, mock_pytrends):
+    """Test each brand gets its own payload, so a low-volume brand keeps its own scale."""
+    mock_trends, _ = mock_pytrends
+    dates = pd.date_range(end=datetime.now(), periods=90, freq='D')
+    # Absolute search volumes: Giant dwarfs Tiny, which is rising on its own scale
+    volumes = {
+        'Giant': [10000.0] * 90,
+        'Tiny': [1.0] * 60 + [3.0] * 30,
+    }
+
+    def interest_over_time():
+        # Trends scales every payload to 0-100 against its strongest keyword
+        kw_list = mock_trends.build_payload.call_args.kwargs['kw_list']
+        peak = max(max(volumes[kw]) for kw in kw_list)
+        return pd.DataFrame(
+            {kw: [round(v / peak * 100) for v in volumes[kw]] for kw in kw_list},
+            index=dates
+        )
+
+    with patch.object(validator, 'pytrends', mock_trends):
+        mock_trends.interest_over_time.side_effect = interest_over_time
+
+        giant = validator.validate_brand_signal('Giant', use_cache=False)
+        tiny = validator.validate_brand_signal('Tiny', use_cache=False)
+
+        assert [c.kwargs['kw_list'] for c in mock_trends.build_payload.call_args_list] == [['Giant'], ['Tiny']]
+        assert giant['trend_direction'] == 'stable'
+        assert tiny['trend_direction'] == 'rising'
+        assert tiny['raw_data']['values'][-1] == 100
+
+
 # ============================================================================
 # ERROR HANDLING TESTS
 # ============================================================================
@@ -0,0 +1,88 @@
+"""
+Test Suite for the worker's heuristic signal scan
+
+Checks that the single-pass scan_signals finds exactly the categories that a
+separate word-boundary search per keyword list would, including phrases that
+overlap each other.
+
+Run tests:
+    pytest eva_worker/tests/test_worker_signals.py -v
+"""
+
+import re
+
+import pytest
+
+# worker.py builds its OpenAI clients at import time
+pytest.importorskip("openai")
+
+from worker import SIGNAL_CATEGORIES, scan_signals
+
+
+def reference_signals(text_lower):
+    """Per-category search, as the heuristics did before the single-pass scan."""
+    found = set()
+    for name, words in SIGNAL_CATEGORIES.items():
+        alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+        if re.search(rf"\b(?:{alternation})", text_lower):
+            found.add(name)
+    return frozenset(found)
+
+
+# ============================================================================
+# OVERLAPPING PHRASES
+# ============================================================================
+
+def test_strong_pos_overlapping_comparative():
+    """"so much better" must not swallow "better than"."""
+    text = "these are so much better than nike"
+    assert scan_signals(text) == {"strong_pos", "compare"}
+
+
+def test_fallback_pos_overlapping_comparative():
+    """"way better" must not swallow "better than"."""
+    text = "way better than my old pair"
+    assert scan_signals(text) == {"fallback_pos", "compare"}
+
+
+def test_prefix_phrase_keeps_shorter_keyword():
+    """"switching from" also signals the bare "switching" keyword."""
+    assert scan_signals("switching from hoka") == {"fallback_switch", "switch"}
+
+
+def test_nested_phrase_later_in_match():
+    """"i'm done with" also signals "done with" starting inside it."""
+    result = scan_signals("i'm done with these")
+    assert {"switch", "fallback_switch", "strong_neg"} <= result
+
+
+def test_word_boundary_respected():
+    assert scan_signals("sunday brunch") == frozenset()
+    assert scan_signals("she runs daily") == {"running"}
+
+
+# ============================================================================
+# EQUIVALENCE WITH PER-CATEGORY SEARCH
+# ============================================================================
+
+@pytest.mark.parametrize("text", [
+    "these are so much better than nike",
+    "way better than my old pair",
+    "more comfortable than my old running shoes",
+    "never going back, love these sneakers",
+    "you should try them, highly recommend for runners",
+    "i'm done with adidas, switched from ultraboost, never again",
+    "this beats everything, not even close, so comfortable",
+    "hate the fit, worse than the last pair, total trash",
+    "nothing relevant here at all",
+])
+def test_matches_reference(text):
+    assert scan_signals(text) == reference_signals(text)
+
+
+def test_matches_reference_on_every_phrase_pair():
+    phrases = sorted({w for words in SIGNAL_CATEGORIES.values() for w in words})
+    for first in phrases:
+        for second in phrases:
+            for text in (f"{first} {second}", f"{first}{second}"):
+                assert scan_signals(text) == reference_signals(text), text
@@ -1,10 +1,15 @@
+import re
 import time
+import select
 import json
+import asyncio
 import logging
-from openai import OpenAI
 
-from eva_common.db import get_connection
-from eva_common.config import app_settings
+import psycopg2
+from openai import AsyncOpenAI
+
+from eva_common.db import get_connection, get_pool
+from eva_common.config import app_settings, db_settings
 
 # Configure logging
 logging.basicConfig(
@@ -35,8 +40,138 @@ MODEL_NAME = app_settings.eva_model
 PROCESSOR_LLM = f"llm:{MODEL_NAME}:v1"
 PROCESSOR_FALLBACK = "fallback:v1"
 NOTIFICATION_POLL_INTERVAL = app_settings.notification_poll_interval
+EXTRACT_MAX_WORKERS = app_settings.extract_max_workers
+# Texts shorter than this (after strip) carry no extractable signal
+MIN_TEXT_LENGTH = 4
+# Channel raised by the raw_messages INSERT trigger (migration 010)
+RAW_MESSAGES_CHANNEL = "raw_messages_new"
+# Upper bound on idle waits while LISTENing, so triggers and notifications
+# still run on schedule
+IDLE_WAIT_SECONDS = NOTIFICATION_POLL_INTERVAL
+# Plain polling interval when LISTEN is unavailable
+POLL_INTERVAL_SECONDS = 10
+# Rows claimed per process_batch call
+BATCH_SIZE = 20
+
+aclient = AsyncOpenAI(api_key=app_settings.openai_api_key) if app_settings.openai_api_key else None
+# One loop for the worker's lifetime so aclient's pooled HTTP connections
+# survive between batches (asyncio.run would close them every time)
+_loop = asyncio.new_event_loop()
+
+SYSTEM_PROMPT = """
+You are the EVA-Finance conversational data analyzer.
+
+Extract structured information from ONE short post/comment.
+
+Return ONLY valid JSON with ALL keys present:
+
+{
+  "brand": [...],
+  "product": [...],
+  "category": [...],
+  "sentiment": "strong_positive|positive|neutral|negative|strong_negative",
+  "intent": "buy|own|recommendation|complaint|none",
+  "tickers": [...],
+  "tags": [...]
+}
+
+Rules:
+- brand: include ALL brands explicitly mentioned (e.g., "Nike" and "Hoka" if both appear).
+- sentiment: do NOT use "neutral" if the text clearly expresses preference, excitement, hate, or switching.
+- intent: choose "own" if the user is describing their usage/switching; "recommendation" only if they advise others.
+- tags: include 2–5 useful tags when there is signal; include "brand-switch" for switching text;
+  include "running" for running context; include "comfort-shoes" if comfort is mentioned.
+Output JSON only. No markdown. No extra fields.
+"""
+
+# Built once; the messages list only varies in the user turn
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+# -----------------------------
+# Heuristic keyword sets
+# -----------------------------
+# Compiled once at import into a single alternation; each message is
+# classified by one finditer pass instead of a scan per keyword list.
+# Patterns are anchored on a leading word boundary so "run" still matches
+# "runs" but not "brunch".
+RUNNING_WORDS = frozenset({"run", "running", "runner"})
+COMFORT_WORDS = frozenset({"comfort", "comfortable"})
+FOOTWEAR_WORDS = frozenset({"shoe", "shoes", "sneaker", "sneakers"})
+
+FALLBACK_SWITCH_WORDS = frozenset({"switching", "switched", "done with", "never going back"})
+FALLBACK_POS_WORDS = frozenset({"love", "amazing", "insane", "way better", "never going back"})
+FALLBACK_NEG_WORDS = frozenset({"hate", "terrible", "awful", "never again"})
+RECOMMEND_WORDS = frozenset({"you should", "highly recommend", "must try"})
+
+# Switch / comparative signals (tight, not "going to", not "over")
+SWITCH_SIGNALS = frozenset({
+    "switching from", "switched from", "moving from",
+    "done with", "never going back", "i'm done with", "im done with",
+    "ditching", "replacing",
+})
+COMPARATIVE_SIGNALS = frozenset({
+    "better than", "worse than",
+    "more comfortable than", "less comfortable than",
+    "not even close", "beats", "crushes", "smokes", "blows",
+})
+STRONG_POS_SIGNALS = frozenset({"love", "amazing", "insane", "never going back", "so much better", "obsessed"})
+STRONG_NEG_SIGNALS = frozenset({"hate", "trash", "awful", "terrible", "never again", "done with"})
+
+SIGNAL_CATEGORIES = {
+    "running": RUNNING_WORDS,
+    "comfort": COMFORT_WORDS,
+    "footwear": FOOTWEAR_WORDS,
+    "fallback_switch": FALLBACK_SWITCH_WORDS,
+    "fallback_pos": FALLBACK_POS_WORDS,
+    "fallback_neg": FALLBACK_NEG_WORDS,
+    "recommend": RECOMMEND_WORDS,
+    "switch": SWITCH_SIGNALS,
+    "compare": COMPARATIVE_SIGNALS,
+    "strong_pos": STRONG_POS_SIGNALS,
+    "strong_neg": STRONG_NEG_SIGNALS,
+}
+
+
+def _build_phrase_index(categories: dict) -> dict:
+    """
+    Map every keyword to the categories it signals.
+
+    At each start position the scan captures only the longest phrase, so a
+    phrase also inherits the categories of every keyword that is a prefix of
+    it (e.g. "switching from" implies "switching"). Keywords that start later
+    inside a phrase are picked up at their own start position.
+    """
+    phrases = {w for words in categories.values() for w in words}
+    index = {}
+    for phrase in phrases:
+        index[phrase] = frozenset(
+            name
+            for name, words in categories.items()
+            if any(phrase.startswith(w) for w in words)
+        )
+    return index
+
+
+_PHRASE_CATEGORIES = _build_phrase_index(SIGNAL_CATEGORIES)
+# Zero-width lookahead so finditer tries every word boundary: overlapping
+# phrases ("so much better than" -> "so much better" and "better than") are
+# all seen instead of the first one consuming the text. Longest first so
+# each position captures its most specific phrase.
+_HEURISTIC_RE = re.compile(
+    r"\b(?=("
+    + "|".join(re.escape(p) for p in sorted(_PHRASE_CATEGORIES, key=len, reverse=True))
+    + "))"
+)
+
+
+def scan_signals(text_lower: str) -> frozenset:
+    """Return the names of every SIGNAL_CATEGORIES entry present in text_lower."""
+    found = set()
+    for match in _HEURISTIC_RE.finditer(text_lower):
+        found |= _PHRASE_CATEGORIES[match.group(1)]
+    return frozenset(found)
 
-client = OpenAI(api_key=app_settings.openai_api_key) if app_settings.openai_api_key else None
 
 def emit_trigger_events():
     """
@@ -45,53 +180,59 @@ def emit_trigger_events():
     """
     with get_connection() as conn:
         with conn.cursor() as cur:
+            # Each trigger is a single INSERT ... SELECT so the rows never
+            # round-trip through Python.
+
             # ---- Trigger A: Tag Elevated ----
             cur.execute("""
-                SELECT tag, day, confidence
-                FROM v_trigger_tag_elevated
-                ORDER BY day DESC;
-            """)
-            elevated = cur.fetchall()
-
-            for tag, day, confidence in elevated:
-                cur.execute("""
-                    INSERT INTO signal_events (event_type, tag, day, severity, payload)
-                    VALUES (%s, %s, %s, %s, %s::jsonb)
-                    ON CONFLICT DO NOTHING;
-                """, (
-                    "TAG_ELEVATED",
+                INSERT INTO signal_events (event_type, tag, day, severity, payload)
+                SELECT
+                    'TAG_ELEVATED',
                     tag,
                     day,
-                    "warning",
-                    json.dumps({"confidence": float(confidence)})
-                ))
+                    'warning',
+                    jsonb_build_object('confidence', confidence::float8)
+                FROM v_trigger_tag_elevated
+                ON CONFLICT DO NOTHING;
+            """)
 
             # ---- Trigger B: Brand Divergence ----
             cur.execute("""
-                SELECT tag_name, brand_name, day, delta_pct
-                FROM v_trigger_brand_divergence
-                ORDER BY day DESC;
-            """)
-            divergence = cur.fetchall()
-
-            for tag_name, brand_name, day, delta_pct in divergence:
-                cur.execute("""
-                    INSERT INTO signal_events (event_type, tag, brand, day, severity, payload)
-                    VALUES (%s, %s, %s, %s, %s, %s::jsonb)
-                    ON CONFLICT DO NOTHING;
-                """, (
-                    "BRAND_DIVERGENCE",
+                INSERT INTO signal_events (event_type, tag, brand, day, severity, payload)
+                SELECT
+                    'BRAND_DIVERGENCE',
                     tag_name,
                     brand_name,
                     day,
-                    "warning",
-                    json.dumps({"delta_pct": float(delta_pct)})
-                ))
+                    'warning',
+                    jsonb_build_object('delta_pct', delta_pct::float8)
+                FROM v_trigger_brand_divergence
+                ON CONFLICT DO NOTHING;
+            """)
 
             conn.commit()
 
 
-def fallback_brain_extract(raw_id: int, text: str):
+def _is_too_short(text: str) -> bool:
+    return not text or len(text.strip()) < MIN_TEXT_LENGTH
+
+
+def _neutral_extraction(raw_id: int) -> dict:
+    """Default result for texts too short to analyze; skips every heuristic and LLM call."""
+    return {
+        "raw_id": raw_id,
+        "brand": [],
+        "product": [],
+        "category": [],
+        "sentiment": "neutral",
+        "intent": "none",
+        "tickers": [],
+        "tags": [],
+        "processor_version": PROCESSOR_FALLBACK,
+    }
+
+
+def fallback_brain_extract(raw_id: int, text: str, text_lower: str = None):
     """
     Minimal, brand-agnostic fallback extractor.
 
@@ -99,8 +240,15 @@ def fallback_brain_extract(raw_id: int, text: str):
       - Never block the pipeline
       - Preserve behavioral intent and basic tags
       - Avoid hardcoded brands, products, or tickers
+
+    text_lower may be passed by callers that already lowercased the text.
     """
-    text_lower = (text or "").lower()
+    if _is_too_short(text):
+        return _neutral_extraction(raw_id)
+
+    if text_lower is None:
+        text_lower = (text or "").lower()
+    signals = scan_signals(text_lower)
 
     brand = []
     product = []
@@ -111,24 +259,24 @@ def fallback_brain_extract(raw_id: int, text: str):
     intent = "none"
 
     # --- Basic tags ---
-    if any(w in text_lower for w in ["run", "running", "runner"]):
+    if "running" in signals:
         tags.append("running")
 
-    if "comfort" in text_lower or "comfortable" in text_lower:
+    if "comfort" in signals:
         tags.append("comfort")
 
-    if any(w in text_lower for w in ["switching", "switched", "done with", "never going back"]):
+    if "fallback_switch" in signals:
         tags.append("brand-switch")
         intent = "own"
 
     # --- Sentiment ---
-    if any(w in text_lower for w in ["love", "amazing", "insane", "way better", "never going back"]):
+    if "fallback_pos" in signals:
         sentiment = "strong_positive"
-    elif any(w in text_lower for w in ["hate", "terrible", "awful", "never again"]):
+    elif "fallback_neg" in signals:
         sentiment = "strong_negative"
 
     # --- Recommendation intent ---
-    if any(w in text_lower for w in ["you should", "highly recommend", "must try"]):
+    if "recommend" in signals:
         intent = "recommendation"
         if sentiment == "neutral":
             sentiment = "positive"
@@ -145,235 +293,298 @@ def fallback_brain_extract(raw_id: int, text: str):
         "processor_version": PROCESSOR_FALLBACK,
     }
 
-def brain_extract(raw_id: int, text: str):
-    if client is None:
-        return fallback_brain_extract(raw_id, text)
+def _completion_kwargs(text: str) -> dict:
+    """Chat-completion arguments for one extraction request."""
+    return {
+        "model": MODEL_NAME,
+        "messages": [_SYSTEM_MSG, {"role": "user", "content": f"Text:\n{text}\n\nReturn JSON only."}],
+        # JSON mode guarantees json.loads-able output; temperature=0 keeps
+        # extraction deterministic across reprocessing runs
+        "response_format": {"type": "json_object"},
+        "temperature": 0,
+    }
 
-    system_prompt = """
-You are the EVA-Finance conversational data analyzer.
 
-Extract structured information from ONE short post/comment.
+def _apply_heuristics(raw_id: int, text_lower: str, content: str) -> dict:
+    """Parse the LLM's JSON reply and apply the brand-agnostic heuristic layer."""
+    data = json.loads(content)
+
+    brand = data.get("brand") or []
+    product = data.get("product") or []
+    category = data.get("category") or []
+    sentiment = data.get("sentiment") or "neutral"
+    intent = data.get("intent") or "none"
+    tickers = data.get("tickers") or []
+    tags = data.get("tags") or []
+    # Set view of tags for O(1) membership; kept in sync with the list
+    tag_set = set(tags)
+
+    # -----------------------------
+    # Brand-agnostic heuristic layer
+    # -----------------------------
+    signals = scan_signals(text_lower)
+
+    def ensure(lst, value):
+        if value not in lst:
+            lst.append(value)
+
+    def ensure_tag(value):
+        if value not in tag_set:
+            tags.append(value)
+            tag_set.add(value)
+
+    # Context tags
+    if "running" in signals:
+        ensure_tag("running")
+
+    # Track comfort generically; only escalate to comfort-shoes if footwear context exists
+    if "comfort" in signals:
+        ensure_tag("comfort")
+        if "running" in tag_set or "footwear" in signals:
+            ensure_tag("comfort-shoes")
+
+    # Switch / comparative signals
+    is_switchy = "switch" in signals
+    is_comparative = "compare" in signals
+
+    # If we have >=2 brands and switch/comparison language, enforce contract
+    if len(brand) >= 2 and (is_switchy or is_comparative):
+        ensure_tag("brand-switch")
+        intent = "own"  # switching implies personal use
+
+    # Don't allow neutral if it's clearly comparative/switchy
+    if sentiment == "neutral" and (is_switchy or is_comparative):
+        if "strong_neg" in signals:
+            sentiment = "strong_negative"
+        elif "strong_pos" in signals:
+            sentiment = "strong_positive"
+        else:
+            sentiment = "positive"
 
-Return ONLY valid JSON with ALL keys present:
+    # If brand-switch exists for any reason, intent shouldn't be none
+    if "brand-switch" in tag_set and (intent in ("none", None, "")):
+        intent = "own"
 
-{
-  "brand": [...],
-  "product": [...],
-  "category": [...],
-  "sentiment": "strong_positive|positive|neutral|negative|strong_negative",
-  "intent": "buy|own|recommendation|complaint|none",
-  "tickers": [...],
-  "tags": [...]
-}
+    # Category nudges only when context supports it
+    if "running" in tag_set:
+        ensure(category, "Footwear")
+        ensure(category, "Running Shoes")
 
-Rules:
-- brand: include ALL brands explicitly mentioned (e.g., "Nike" and "Hoka" if both appear).
-- sentiment: do NOT use "neutral" if the text clearly expresses preference, excitement, hate, or switching.
-- intent: choose "own" if the user is describing their usage/switching; "recommendation" only if they advise others.
-- tags: include 2–5 useful tags when there is signal; include "brand-switch" for switching text;
-  include "running" for running context; include "comfort-shoes" if comfort is mentioned.
-Output JSON only. No markdown. No extra fields.
-"""
+    # Optional: enforce tag count
+    if len(tags) > 5:
+        tags = tags[:5]
+        tag_set = set(tags)
 
-    user_prompt = f"Text:\n{text}\n\nReturn JSON only."
+    # Normalize overlapping comfort tags
+    if "comfort" in tag_set and "comfort-shoes" in tag_set:
+        tags = [t for t in tags if t != "comfort"]
+        tag_set.discard("comfort")
 
-    try:
-        resp = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        )
+    # Final intent normalization (authoritative)
+    if "brand-switch" in tag_set and intent in (None, "", "none"):
+        intent = "own"
 
-        content = resp.choices[0].message.content
-        data = json.loads(content)
+    if "brand-switch" in tag_set and sentiment == "neutral":
+        sentiment = "positive"
 
-        brand = data.get("brand") or []
-        product = data.get("product") or []
-        category = data.get("category") or []
-        sentiment = data.get("sentiment") or "neutral"
-        intent = data.get("intent") or "none"
-        tickers = data.get("tickers") or []
-        tags = data.get("tags") or []
+    return {
+        "raw_id": raw_id,
+        "brand": brand,
+        "product": product,
+        "category": category,
+        "sentiment": sentiment,
+        "intent": intent,
+        "tickers": tickers,
+        "tags": tags,
+        "processor_version": PROCESSOR_LLM,
+    }
 
-        
 
-        # -----------------------------
-        # Brand-agnostic heuristic layer
-        # -----------------------------
-        text_lower = (text or "").lower()
+async def brain_extract_async(raw_id: int, text: str, limiter: asyncio.Semaphore):
+    """Extract one message, awaiting the LLM so a batch's calls overlap on one event loop."""
+    if _is_too_short(text):
+        return _neutral_extraction(raw_id)
 
-        def ensure(lst, value):
-            if value not in lst:
-                lst.append(value)    
-
-        # Context tags
-        if any(w in text_lower for w in ["run", "running", "runner"]):
-            ensure(tags, "running")
-        
-
-        # Track comfort generically; only escalate to comfort-shoes if footwear context exists
-        if any(w in text_lower for w in ["comfort", "comfortable"]):
-            ensure(tags, "comfort")
-            if "running" in tags or any(w in text_lower for w in ["shoe", "shoes", "sneaker", "sneakers"]):
-                ensure(tags, "comfort-shoes")
-
-        # Switch / comparative signals (tight, not "going to", not "over")
-        switch_signals = [
-            "switching from", "switched from", "moving from",
-            "done with", "never going back", "i'm done with", "im done with",
-            "ditching", "replacing"
-        ]
-
-        comparative_signals = [
-            "better than", "worse than",
-            "more comfortable than", "less comfortable than",
-            "not even close", "beats", "crushes", "smokes", "blows"
-        ]
-
-        strong_pos_signals = ["love", "amazing", "insane", "never going back", "so much better", "obsessed"]
-        strong_neg_signals = ["hate", "trash", "awful", "terrible", "never again", "done with"]
-
-        is_switchy = any(s in text_lower for s in switch_signals)
-        is_comparative = any(s in text_lower for s in comparative_signals)
-
-        # If we have >=2 brands and switch/comparison language, enforce contract
-        if len(brand) >= 2 and (is_switchy or is_comparative):
-            ensure(tags, "brand-switch")
-            intent = "own"  # switching implies personal use
-
-        # Don't allow neutral if it's clearly comparative/switchy
-        if sentiment == "neutral" and (is_switchy or is_comparative):
-            if any(s in text_lower for s in strong_neg_signals):
-                sentiment = "strong_negative"
-            elif any(s in text_lower for s in strong_pos_signals):
-                sentiment = "strong_positive"
-            else:
-                sentiment = "positive"
-
-        # If brand-switch exists for any reason, intent shouldn't be none
-        if "brand-switch" in tags and (intent in ("none", None, "")):
-            intent = "own"
-
-        # Category nudges only when context supports it
-        if "running" in tags:
-            ensure(category, "Footwear")
-            ensure(category, "Running Shoes")
-
-        # Optional: enforce tag count
-        if len(tags) > 5:
-            tags = tags[:5]
-
-        # Normalize overlapping comfort tags
-        if "comfort" in tags and "comfort-shoes" in tags:
-            tags = [t for t in tags if t != "comfort"]   
-
-        # Final intent normalization (authoritative)
-        if "brand-switch" in tags and intent in (None, "", "none"):
-            intent = "own"
-
-         
-        if "brand-switch" in tags and sentiment == "neutral":
-            sentiment = "positive"   
-
-        return {
-            "raw_id": raw_id,
-            "brand": brand,
-            "product": product,
-            "category": category,
-            "sentiment": sentiment,
-            "intent": intent,
-            "tickers": tickers,
-            "tags": tags,
-            "processor_version": PROCESSOR_LLM,
-        }
+    # Lowercased once; shared by the heuristic layer and the fallback path
+    text_lower = text.lower()
+
+    if aclient is None:
+        return fallback_brain_extract(raw_id, text, text_lower)
+
+    try:
+        async with limiter:
+            resp = await aclient.chat.completions.create(**_completion_kwargs(text))
+        return _apply_heuristics(raw_id, text_lower, resp.choices[0].message.content)
 
     except Exception as e:
-        print(f"[EVA-WORKER] LLM extraction failed for raw_id={raw_id}: {e}")
-        return fallback_brain_extract(raw_id, text)
+        logger.warning(f"[EVA-WORKER] LLM extraction failed for raw_id={raw_id}: {e}")
+        return fallback_brain_extract(raw_id, text, text_lower)
+
+
+def brain_extract(raw_id: int, text: str):
+    """Synchronous single-message extraction; runs brain_extract_async on the worker loop."""
+    return _loop.run_until_complete(brain_extract_async(raw_id, text, asyncio.Semaphore(1)))
+
+
+async def _extract_batch(rows) -> list:
+    """Run every row's extraction concurrently, capped at EXTRACT_MAX_WORKERS in flight."""
+    limiter = asyncio.Semaphore(EXTRACT_MAX_WORKERS)
+    return await asyncio.gather(
+        *(brain_extract_async(raw_id, text, limiter) for raw_id, text in rows),
+        return_exceptions=True,
+    )
+
+
+def _prepare_inserts(cur) -> None:
+    """
+    PREPARE the per-row statements on this connection.
+
+    Postgres then parses and plans them once per batch rather than once per
+    row. Prepared statements aren't transactional, so they survive the
+    rollbacks in the per-row retry path; _deallocate_inserts drops them.
+    """
+    cur.execute("""
+        PREPARE ins_processed (integer, text[], text[], text[], text, text, text[], text[], text) AS
+        INSERT INTO processed_messages
+          (raw_id, brand, product, category, sentiment, intent, tickers, tags, processor_version)
+        VALUES
+          ($1, $2, $3, $4, $5, $6, $7, $8, $9);
+
+        PREPARE mark_processed (integer) AS
+        UPDATE raw_messages SET processed = TRUE WHERE id = $1 AND processed = FALSE;
+    """)
+
+
+def _deallocate_inserts(cur) -> None:
+    """Drop the prepared statements before the connection goes back to the pool."""
+    cur.execute("DEALLOCATE ins_processed; DEALLOCATE mark_processed;")
+
+
+def _insert_processed(cur, data: dict) -> bool:
+    """
+    Mark one raw row processed and insert its extraction result (caller commits).
+
+    The mark goes first and only flips unprocessed rows, so after a rollback
+    has released this batch's row locks a row another worker already
+    finished is skipped instead of inserted twice. Returns False if skipped.
+    """
+    cur.execute("EXECUTE mark_processed (%s);", (data["raw_id"],))
+    if cur.rowcount == 0:
+        return False
+
+    cur.execute(
+        "EXECUTE ins_processed (%s, %s, %s, %s, %s, %s, %s, %s, %s);",
+        (
+            data["raw_id"],
+            data["brand"],
+            data["product"],
+            data["category"],
+            data["sentiment"],
+            data["intent"],
+            data["tickers"],
+            data["tags"],
+            data["processor_version"],
+        ),
+    )
+    return True
+
+
+def _persist_results(conn, cur, results: list) -> int:
+    """
+    Write a batch of extraction results on one connection and cursor.
+
+    The whole batch commits once. If that fails, it is rolled back and
+    retried row by row so a single bad row doesn't discard the rest.
+    """
+    _prepare_inserts(cur)
+    try:
+        try:
+            for data in results:
+                _insert_processed(cur, data)
+            conn.commit()
+            return len(results)
+        except Exception as e:
+            conn.rollback()
+            logger.warning(
+                f"[EVA-WORKER] Batch write of {len(results)} rows failed, "
+                f"retrying row by row: {e}"
+            )
+
+        count = 0
+        for data in results:
+            try:
+                inserted = _insert_processed(cur, data)
+                conn.commit()
+                count += inserted
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"[EVA-WORKER] Failed processing raw_id={data['raw_id']}: {e}")
+        return count
+    finally:
+        _deallocate_inserts(cur)
+        conn.commit()
 
 
 def process_batch(limit: int = 20) -> int:
-    # 1) Fetch unprocessed rows
+    # One connection serves the fetch and every write in the batch
     with get_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
+        # 1) Fetch unprocessed rows through a server-side cursor so a large
+        # limit streams in itersize chunks instead of one client-side result.
+        # The scan is served by the idx_raw_messages_unprocessed partial index.
+        # FOR UPDATE SKIP LOCKED lets several worker replicas run side by side:
+        # each claims a disjoint set of rows, held until the batch commits (or
+        # released automatically if this worker dies mid-batch).
+        with conn.cursor(name="unprocessed_scan") as scan:
+            scan.itersize = min(limit, 500)
+            scan.execute(
                 """
                 SELECT id, text
                 FROM raw_messages
                 WHERE processed = FALSE
                 ORDER BY id ASC
-                LIMIT %s;
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED;
                 """,
                 (limit,),
             )
-            rows = cur.fetchall()
+            rows = list(scan)
 
-    if not rows:
-        return 0
+        if not rows:
+            return 0
 
-    # 2) Process each row
-    count = 0
-    brands_to_map = []  # Collect brands for batch mapping
+        # 2) Extract concurrently - each call is an OpenAI round-trip, so the
+        # requests overlap on one event loop
+        extracted = _loop.run_until_complete(_extract_batch(rows))
 
-    for raw_id, text in rows:
-        try:
-            data = brain_extract(raw_id, text)
-
-            # Collect brands for mapping (non-blocking)
-            if data.get("brand"):
-                brands_to_map.extend(data["brand"])
-
-            with get_connection() as conn:
-                with conn.cursor() as cur:
-                    # Insert processed row
-                    cur.execute(
-                        """
-                        INSERT INTO processed_messages
-                          (raw_id, brand, product, category, sentiment, intent, tickers, tags, processor_version)
-                        VALUES
-                          (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        RETURNING id;
-                        """,
-                        (
-                            data["raw_id"],
-                            data["brand"],
-                            data["product"],
-                            data["category"],
-                            data["sentiment"],
-                            data["intent"],
-                            data["tickers"],
-                            data["tags"],
-                            data["processor_version"],
-                        ),
-                    )
-
-                    _new_id = cur.fetchone()[0]
-
-                    # Mark raw processed
-                    cur.execute(
-                        "UPDATE raw_messages SET processed = TRUE WHERE id = %s;",
-                        (raw_id,),
-                    )
-
-                    conn.commit()
-
-            count += 1
+        # 3) Persist results
+        results = []
+        for (raw_id, _text), data in zip(rows, extracted):
+            if isinstance(data, BaseException):
+                logger.error(f"[EVA-WORKER] Failed processing raw_id={raw_id}: {data}")
+            else:
+                results.append(data)
 
-        except Exception as e:
-            print(f"[EVA-WORKER] Failed processing raw_id={raw_id}: {e}")
+        count = 0
+        if results:
+            with conn.cursor() as cur:
+                try:
+                    count = _persist_results(conn, cur, results)
+                except Exception as e:
+                    logger.error(f"[EVA-WORKER] Failed persisting batch of {len(results)} rows: {e}")
 
-    # 3) Batch map brands to tickers (non-blocking)
+    # Collect brands for mapping (non-blocking)
+    brands_to_map = [b for data in results for b in (data.get("brand") or [])]
+
+    # 4) Batch map brands to tickers (non-blocking)
     if brands_to_map and brand_mapper_enabled and ensure_brands_mapped:
         try:
-            unique_brands = list(set(brands_to_map))
-            results = ensure_brands_mapped(unique_brands)
+            unique_brands = list(dict.fromkeys(brands_to_map))
+            mapping = ensure_brands_mapped(unique_brands)
             mapped_count = sum(
-                1 for r in results.values()
+                1 for r in mapping.values()
                 if r.status.value in ("already_mapped", "mapped_success")
             )
-            if mapped_count > 0 or len(results) > 0:
+            if mapped_count > 0 or len(mapping) > 0:
                 logger.debug(
                     f"[EVA-WORKER] Brand mapping: {mapped_count}/{len(unique_brands)} "
                     f"brands mapped/cached"
@@ -384,23 +595,77 @@ def process_batch(limit: int = 20) -> int:
 
     return count
 
+def _open_listener():
+    """
+    Open a dedicated autocommit connection LISTENing for new raw messages.
+
+    Kept outside the shared pool because it is held for the worker's lifetime.
+    Returns None if the connection can't be made; the caller then falls back
+    to plain timed polling.
+    """
+    try:
+        conn = psycopg2.connect(db_settings.connection_url)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {RAW_MESSAGES_CHANNEL};")
+        return conn
+    except Exception as e:
+        logger.warning(f"[EVA-WORKER] LISTEN unavailable, falling back to polling: {e}")
+        return None
+
+
+def _wait_for_messages(listener, timeout: float):
+    """
+    Block until raw_messages_new fires or the timeout passes.
+
+    Returns the listener to keep using, or None if it broke (it is reopened
+    on the next iteration).
+    """
+    if listener is None:
+        time.sleep(POLL_INTERVAL_SECONDS)
+        return None
+
+    try:
+        if select.select([listener], [], [], timeout) != ([], [], []):
+            listener.poll()
+            listener.notifies.clear()
+        return listener
+    except Exception as e:
+        logger.warning(f"[EVA-WORKER] LISTEN connection lost: {e}")
+        try:
+            listener.close()
+        except Exception:
+            pass
+        return None
+
+
 def main():
-    print("EVA worker starting up...")
+    logger.info("[EVA-WORKER] Starting up...")
+    # Open the shared pool up front so the first batch doesn't pay connection setup
+    get_pool()
     last_notification_poll = 0
+    listener = None
 
     while True:
-        n = process_batch(limit=20)
+        if listener is None:
+            listener = _open_listener()
+
+        n = process_batch(limit=BATCH_SIZE)
         if n:
-            print(f"Processed {n} messages")
+            logger.info(f"[EVA-WORKER] Processed {n} messages")
 
         # Emit trigger-based signal events
         emit_trigger_events()
 
         # Notification polling (every NOTIFICATION_POLL_INTERVAL seconds)
         current_time = time.time()
-        print(f"[DEBUG] Checking notification poll: poll_and_notify={bool(poll_and_notify)}, elapsed={current_time - last_notification_poll:.1f}s, interval={NOTIFICATION_POLL_INTERVAL}s", flush=True)
+        # %-style args: the message is only formatted if DEBUG is enabled
+        logger.debug(
+            "[EVA-WORKER] Checking notification poll: poll_and_notify=%s, elapsed=%.1fs, interval=%ss",
+            bool(poll_and_notify), current_time - last_notification_poll, NOTIFICATION_POLL_INTERVAL,
+        )
         if poll_and_notify and (current_time - last_notification_poll) >= NOTIFICATION_POLL_INTERVAL:
-            print("[DEBUG] Entering notification poll...", flush=True)
+            logger.debug("[EVA-WORKER] Entering notification poll...")
             try:
                 stats = poll_and_notify()
                 if stats["sent"] > 0 or stats["failed"] > 0:
@@ -410,7 +675,13 @@ def main():
             finally:
                 last_notification_poll = current_time
 
-        time.sleep(10)
+        # A full batch means more rows are likely pending: go straight back
+        # for them instead of waiting for the next notification
+        if n >= BATCH_SIZE:
+            continue
+
+        # Sleep until new raw messages are inserted (or the idle timeout)
+        listener = _wait_for_messages(listener, IDLE_WAIT_SECONDS)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
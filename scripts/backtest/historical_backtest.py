@@ -7,8 +7,10 @@ Implements Phase 0 validation from social-signal-trading skill
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -18,6 +20,14 @@ import json
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Optional JIT for the trend-scan kernel; falls back to plain Python loops
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
 # Database config
 DB_CONFIG = {
     'host': '172.20.0.2',  # Docker container IP
@@ -27,6 +37,18 @@ DB_CONFIG = {
     'password': 'eva_password_change_me'
 }
 
+# Connection pool bounds (shared by all query helpers)
+DB_POOL_MIN = 1
+DB_POOL_MAX = 16
+
+# CUSUM surge detector on standardized weekly counts (in units of std dev)
+CUSUM_SLACK = 0.5      # Drift allowance k per week
+CUSUM_THRESHOLD = 4.0  # Alarm level h
+
+# Return horizons (days after signal) measured by the backtest
+DAYS_FORWARD = [30, 60, 90, 180]
+RETURN_COLUMNS = [f'return_{days}d' for days in DAYS_FORWARD]
+
 # Brand to ticker mapping (update with actual mappings)
 BRAND_TO_TICKER = {
     # Athletic/Running
@@ -73,181 +95,346 @@ BRAND_MATERIALITY = {
     'nike': {'ticker': 'NKE', 'revenue_share': 1.0, 'growth_lever': 0.4},  # Too big to move on trends
 }
 
+# Brands are matched lowercased; normalize keys once so lookups never need .lower()
+BRAND_TO_TICKER = {brand.lower(): ticker for brand, ticker in BRAND_TO_TICKER.items()}
+BRAND_MATERIALITY = {brand.lower(): info for brand, info in BRAND_MATERIALITY.items()}
+
+# Only tradeable brands are aggregated (filter is pushed into SQL)
+TRADEABLE_BRANDS = tuple(brand for brand, ticker in BRAND_TO_TICKER.items() if ticker)
+
 
-def get_brand_mentions_over_time(brand: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+_pool: Optional[ThreadedConnectionPool] = None
+
+
+def get_pool() -> ThreadedConnectionPool:
     """
-    Get daily mention counts for a brand over time period
+    Get or create the module connection pool (RealDictCursor by default)
     """
-    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
-    cursor = conn.cursor()
+    global _pool
+    if _pool is None:
+        _pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **DB_CONFIG, cursor_factory=RealDictCursor)
+    return _pool
+
 
+@contextmanager
+def get_connection():
+    """
+    Borrow a pooled connection, returning it to the pool on exit
+    """
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def get_weekly_brand_mentions(brands: List[str], start_date: datetime, end_date: datetime) -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    Get weekly mention counts for all brands in a single aggregate query
+
+    Weeks are labelled by their Sunday end date to match resample('W').
+
+    Returns:
+        (weeks, brands, matrix): contiguous datetime64[D] week labels, sorted
+        brand names, and a weeks x brands float64 matrix of mention counts
+        with empty weeks filled with zero
+    """
     query = """
         SELECT
-            DATE(timestamp) as date,
-            COUNT(*) as mention_count,
-            AVG(CAST(meta->>'score' AS INT)) as avg_score
+            b.brand,
+            (date_trunc('week', rm.timestamp) + INTERVAL '6 days')::date AS week,
+            COUNT(*) AS mention_count
         FROM processed_messages pm
         JOIN raw_messages rm ON rm.id = pm.raw_id
-        WHERE %s = ANY(brand)
-        AND timestamp BETWEEN %s AND %s
-        GROUP BY DATE(timestamp)
-        ORDER BY DATE(timestamp)
+        CROSS JOIN LATERAL unnest(pm.brand) AS b(brand)
+        WHERE pm.brand && %s::text[]
+        AND b.brand = ANY(%s::text[])
+        AND rm.timestamp BETWEEN %s AND %s
+        GROUP BY 1, 2
     """
 
-    cursor.execute(query, (brand.lower(), start_date, end_date))
-    results = cursor.fetchall()
+    brand_col = []
+    week_col = []
+    count_col = []
 
-    conn.close()
+    # Server-side cursor streams rows in itersize chunks into flat columns
+    with get_connection() as conn:
+        with conn.cursor(name='c_brand_weekly', cursor_factory=psycopg2.extensions.cursor) as cursor:
+            cursor.itersize = 10000
+            cursor.execute(query, (brands, brands, start_date, end_date))
+            for brand, week, mention_count in cursor:
+                brand_col.append(brand)
+                week_col.append(week)
+                count_col.append(mention_count)
+        conn.commit()
 
-    if not results:
-        return pd.DataFrame()
+    if not brand_col:
+        return np.array([], dtype='datetime64[D]'), [], np.zeros((0, 0))
 
-    df = pd.DataFrame(results)
-    df['date'] = pd.to_datetime(df['date'])
-    df.set_index('date', inplace=True)
+    brand_names, brand_idx = np.unique(brand_col, return_inverse=True)
+    week_days = np.array(week_col, dtype='datetime64[D]')
+    counts = np.array(count_col, dtype=np.float64)
 
-    return df
+    # Bin straight into a dense matrix; week labels are 7 days apart
+    first_week = week_days.min()
+    week_idx = (week_days - first_week).astype(np.int64) // 7
+    n_weeks = int(week_idx.max()) + 1
+
+    matrix = np.zeros((n_weeks, len(brand_names)), dtype=np.float64)
+    np.add.at(matrix, (week_idx, brand_idx), counts)
+    weeks = first_week + 7 * np.arange(n_weeks)
+
+    return weeks, [str(brand) for brand in brand_names], matrix
+
+
+def _first_trend_kernel(weekly, starts, ends, min_increase, min_baseline_mentions):
+    """
+    Find the first surge week for each brand column of a weekly mention matrix
+
+    For brand b, scans weeks i in [starts[b] + 4, ends[b] - 3) (its active
+    span) comparing the 4 weeks before i (baseline) with week i and the 3
+    after (surge).
+
+    Returns:
+        Array of week indices per brand, -1 where no trend was found
+    """
+    n_brands = weekly.shape[1]
+    out = np.full(n_brands, -1, np.int64)
+    for b in prange(n_brands):
+        for i in range(starts[b] + 4, ends[b] - 3):
+            baseline = 0.0
+            surge = 0.0
+            for k in range(4):
+                baseline += weekly[i - 4 + k, b]
+                surge += weekly[i + k, b]
+            if baseline > 0 and baseline >= min_baseline_mentions and surge / baseline >= min_increase:
+                out[b] = i
+                break
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _first_trend = njit(parallel=True, cache=True)(_first_trend_kernel)
+else:
+    _first_trend = _first_trend_kernel
+
+
+def _cusum_trend_starts(matrix: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                        min_baseline_mentions: float,
+                        slack: float = CUSUM_SLACK, threshold: float = CUSUM_THRESHOLD) -> np.ndarray:
+    """
+    Find the first significant upward shift in each brand column with a one-sided CUSUM
 
+    Counts are standardized over the brand's active span and accumulated as
+    S_t = max(0, S_{t-1} + z_t - slack), computed in closed form from the
+    running minimum of cumsum(z - slack). The trend starts where the run that
+    first crosses threshold began; runs whose preceding 4-week baseline is
+    below min_baseline_mentions are skipped.
 
-def detect_historical_trends(min_increase: float = 2.0, min_baseline_mentions: int = 3) -> List[Dict]:
+    Returns:
+        Array of week indices per brand, -1 where no trend was found
+    """
+    out = np.full(matrix.shape[1], -1, np.int64)
+
+    for b in range(matrix.shape[1]):
+        lo = starts[b]
+        counts = matrix[lo:ends[b] + 1, b]
+        if len(counts) < 8:  # Need at least 8 weeks of data
+            continue
+
+        std = counts.std()
+        if std == 0:
+            continue
+
+        z = (counts - counts.mean()) / std
+        cum = np.cumsum(z - slack)
+        cusum = cum - np.minimum.accumulate(np.minimum(cum, 0.0))
+
+        checked = set()
+        for alarm in np.flatnonzero(cusum > threshold):
+            resets = np.flatnonzero(cusum[:alarm] == 0)
+            change = int(resets[-1]) + 1 if resets.size else 0
+            if change in checked:
+                continue
+            checked.add(change)
+
+            # Need a full 4-week baseline before and surge window after the change
+            if change < 4 or change > len(counts) - 5:
+                continue
+            if counts[change - 4:change].sum() < max(min_baseline_mentions, 1):
+                continue
+
+            out[b] = lo + change
+            break
+
+    return out
+
+
+def detect_historical_trends(min_increase: float = 2.0, min_baseline_mentions: int = 3,
+                             method: str = 'cusum') -> List[Dict]:
     """
     Find clear brand trends in historical data
 
     Args:
-        min_increase: Minimum mention increase ratio (2.0 = 2x increase)
+        min_increase: Minimum mention increase ratio (2.0 = 2x increase); 'ratio' method only
         min_baseline_mentions: Minimum mentions in baseline period
+        method: 'cusum' (change-point detector) or 'ratio' (fixed 4-week split)
 
     Returns:
         List of detected trends with metadata
     """
     logger.info("Scanning for historical brand trends...")
 
-    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
-    cursor = conn.cursor()
+    # Get mentions over time (last 12 months of historical data)
+    end_date = datetime.now() - timedelta(days=30)
+    start_date = end_date - timedelta(days=365)
+
+    weeks, brands, matrix = get_weekly_brand_mentions(list(TRADEABLE_BRANDS), start_date, end_date)
 
-    # Get all unique brands
-    cursor.execute("""
-        SELECT DISTINCT unnest(brand) as brand
-        FROM processed_messages
-        WHERE brand IS NOT NULL AND brand != '{}'
-        ORDER BY brand
-    """)
-    brands = [row['brand'] for row in cursor.fetchall()]
+    logger.info(f"Found {len(brands)} tradeable brands in historical data")
 
-    conn.close()
+    if not brands:
+        logger.info("Detected 0 tradeable historical trends")
+        return []
 
-    logger.info(f"Found {len(brands)} unique brands in historical data")
+    # Each brand is scanned only over its active span
+    active = matrix > 0
+    starts = active.argmax(axis=0).astype(np.int64)
+    ends = (len(matrix) - 1 - active[::-1].argmax(axis=0)).astype(np.int64)
+
+    # Only take first clear trend per brand
+    if method == 'cusum':
+        logger.info(f"Trend detector: cusum (slack={CUSUM_SLACK}, threshold={CUSUM_THRESHOLD}, "
+                    f"min_baseline_mentions={min_baseline_mentions})")
+        first_weeks = _cusum_trend_starts(matrix, starts, ends, float(min_baseline_mentions))
+    elif method == 'ratio':
+        logger.info(f"Trend detector: ratio (min_increase={min_increase}, "
+                    f"min_baseline_mentions={min_baseline_mentions})")
+        first_weeks = _first_trend(matrix, starts, ends, float(min_increase), float(min_baseline_mentions))
+    else:
+        raise ValueError(f"Unknown trend detection method: {method}")
 
     trends = []
 
-    for brand in brands:
-        # Skip if not tradeable
-        ticker = BRAND_TO_TICKER.get(brand.lower())
-        if not ticker:
+    for b, brand in enumerate(brands):
+        i = first_weeks[b]
+        if i < 0:
             continue
 
-        # Get mentions over time (last 12 months of historical data)
-        end_date = datetime.now() - timedelta(days=30)
-        start_date = end_date - timedelta(days=365)
+        ticker = BRAND_TO_TICKER[brand]
+        trend_start = pd.Timestamp(weeks[i])
+        baseline = matrix[i - 4:i, b].sum()
+        surge = matrix[i:i + 4, b].sum()
+        increase_ratio = surge / baseline
 
-        mentions_df = get_brand_mentions_over_time(brand, start_date, end_date)
+        trends.append({
+            'brand': brand,
+            'ticker': ticker,
+            'trend_start': trend_start,
+            'baseline_mentions': int(baseline),
+            'surge_mentions': int(surge),
+            'increase_ratio': float(increase_ratio),
+            'materiality': BRAND_MATERIALITY.get(brand, {}).get('revenue_share', 0.5)
+        })
 
-        if mentions_df.empty:
-            continue
+        logger.info(f"Found trend: {brand} ({ticker}) - {increase_ratio:.1f}x increase starting {trend_start.date()}")
+
+    logger.info(f"Detected {len(trends)} tradeable historical trends")
+    return trends
 
-        # Resample to weekly for trend detection
-        weekly = mentions_df.resample('W').sum()
 
-        if len(weekly) < 8:  # Need at least 8 weeks of data
-            continue
+def download_prices(trends: List[Dict], days_forward: List[int] = DAYS_FORWARD) -> pd.DataFrame:
+    """
+    Download daily closes for every trend ticker in a single request
 
-        # Split into baseline (first 4 weeks) and surge (next 4 weeks)
-        for i in range(4, len(weekly) - 4):
-            baseline = weekly.iloc[i-4:i]['mention_count'].sum()
-            surge = weekly.iloc[i:i+4]['mention_count'].sum()
+    Covers 7 days before the earliest signal through max(days_forward) + 30
+    days after the latest one, so each trend can be sliced from memory.
 
-            if baseline < min_baseline_mentions:
-                continue
+    Returns:
+        DataFrame of closing prices indexed by date, one column per ticker
+    """
+    if not trends:
+        return pd.DataFrame()
+
+    tickers = sorted({t['ticker'] for t in trends})
+    global_start = min(t['trend_start'] for t in trends) - timedelta(days=7)
+    global_end = max(t['trend_start'] for t in trends) + timedelta(days=max(days_forward) + 30)
 
-            increase_ratio = surge / baseline if baseline > 0 else 0
+    logger.info(f"Downloading prices for {len(tickers)} tickers ({global_start.date()} to {global_end.date()})")
 
-            if increase_ratio >= min_increase:
-                trend_start = weekly.index[i]
+    try:
+        data = yf.download(
+            tickers,
+            start=global_start,
+            end=global_end,
+            threads=True,
+            progress=False,
+            auto_adjust=True
+        )
+    except Exception as e:
+        logger.error(f"Error downloading stock data: {e}")
+        return pd.DataFrame()
 
-                trends.append({
-                    'brand': brand,
-                    'ticker': ticker,
-                    'trend_start': trend_start,
-                    'baseline_mentions': int(baseline),
-                    'surge_mentions': int(surge),
-                    'increase_ratio': float(increase_ratio),
-                    'materiality': BRAND_MATERIALITY.get(brand.lower(), {}).get('revenue_share', 0.5)
-                })
+    if data.empty:
+        return pd.DataFrame()
 
-                logger.info(f"Found trend: {brand} ({ticker}) - {increase_ratio:.1f}x increase starting {trend_start.date()}")
-                break  # Only take first clear trend per brand
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        # Older yfinance returns flat columns for a single ticker
+        closes = closes.to_frame(tickers[0])
 
-    logger.info(f"Detected {len(trends)} tradeable historical trends")
-    return trends
+    return closes
 
 
-def get_stock_performance(ticker: str, start_date: datetime, days_forward: List[int] = [30, 60, 90, 180]) -> Dict[int, float]:
+def get_stock_performance(prices: pd.Series, start_date: datetime, days_forward: List[int] = DAYS_FORWARD) -> Dict[int, float]:
     """
     Get stock returns at various intervals after a signal date
 
     Args:
-        ticker: Stock ticker symbol
+        prices: Daily closing prices for the ticker (from download_prices)
         start_date: Signal date
         days_forward: List of days to measure returns (e.g., [30, 60, 90])
 
     Returns:
         Dict mapping days_forward to return percentages
     """
-    try:
-        # Download stock data (start - 7 days for baseline, end + max days forward)
-        download_start = start_date - timedelta(days=7)
-        download_end = start_date + timedelta(days=max(days_forward) + 30)
+    prices = prices.dropna()
+    dates = prices.index
+    closes = prices.to_numpy()
 
-        stock = yf.Ticker(ticker)
-        hist = stock.history(start=download_start, end=download_end)
-
-        if hist.empty:
-            logger.warning(f"No stock data for {ticker}")
-            return {}
-
-        # Get price at signal date (or closest trading day after)
-        signal_prices = hist.loc[hist.index >= start_date]['Close']
-        if signal_prices.empty:
-            return {}
-
-        entry_price = signal_prices.iloc[0]
-        entry_date = signal_prices.index[0]
+    # Get price at signal date (or closest trading day after); the index is sorted, so binary search
+    entry_i = dates.searchsorted(start_date, side='left')
+    if entry_i >= len(closes):
+        return {}
 
-        returns = {}
+    entry_price = closes[entry_i]
+    entry_date = dates[entry_i]
 
-        for days in days_forward:
-            target_date = entry_date + timedelta(days=days)
-            future_prices = hist.loc[hist.index >= target_date]['Close']
+    returns = {}
 
-            if future_prices.empty:
-                returns[days] = None
-            else:
-                exit_price = future_prices.iloc[0]
-                returns[days] = ((exit_price - entry_price) / entry_price) * 100
+    for days in days_forward:
+        exit_i = dates.searchsorted(entry_date + timedelta(days=days), side='left')
 
-        return returns
+        if exit_i >= len(closes):
+            returns[days] = None
+        else:
+            exit_price = closes[exit_i]
+            returns[days] = ((exit_price - entry_price) / entry_price) * 100
 
-    except Exception as e:
-        logger.error(f"Error fetching stock data for {ticker}: {e}")
-        return {}
+    return returns
 
 
-def run_backtest(trends: List[Dict]) -> pd.DataFrame:
+def run_backtest(trends: List[Dict], prices: pd.DataFrame) -> pd.DataFrame:
     """
     Run backtest on detected trends
 
     Args:
         trends: List of trend dictionaries from detect_historical_trends()
+        prices: Closing prices from download_prices()
 
     Returns:
         DataFrame with backtest results
@@ -263,8 +450,11 @@ def run_backtest(trends: List[Dict]) -> pd.DataFrame:
 
         logger.info(f"Backtesting {brand} ({ticker}) from {trend_start.date()}")
 
-        # Get stock performance
-        returns = get_stock_performance(ticker, trend_start)
+        if ticker not in prices.columns:
+            logger.warning(f"No stock data for {ticker}")
+            returns = {}
+        else:
+            returns = get_stock_performance(prices[ticker], trend_start)
 
         if not returns:
             logger.warning(f"Skipping {brand} - no stock data available")
@@ -310,24 +500,23 @@ def analyze_results(results: pd.DataFrame) -> Dict:
 
     total_signals = len(results)
 
-    # Calculate win rates
-    win_rate_30d = (results['return_30d'] > 0).sum() / results['return_30d'].notna().sum() * 100 if results['return_30d'].notna().sum() > 0 else 0
-    win_rate_60d = (results['return_60d'] > 0).sum() / results['return_60d'].notna().sum() * 100 if results['return_60d'].notna().sum() > 0 else 0
-    win_rate_90d = (results['return_90d'] > 0).sum() / results['return_90d'].notna().sum() * 100 if results['return_90d'].notna().sum() > 0 else 0
-    win_rate_180d = (results['return_180d'] > 0).sum() / results['return_180d'].notna().sum() * 100 if results['return_180d'].notna().sum() > 0 else 0
+    # Win rates and winner means for every horizon in one pass over the returns block
+    arr = results[RETURN_COLUMNS].to_numpy(dtype=np.float64)
+    mask_valid = ~np.isnan(arr)
+    mask_win = (arr > 0) & mask_valid
+    valid_counts = mask_valid.sum(axis=0)
+    win_counts = mask_win.sum(axis=0)
 
-    # Calculate average returns (winners only)
-    winners_30d = results[results['return_30d'] > 0]['return_30d']
-    winners_90d = results[results['return_90d'] > 0]['return_90d']
-    winners_180d = results[results['return_180d'] > 0]['return_180d']
+    win_rates = np.divide(win_counts * 100.0, valid_counts,
+                          out=np.zeros(arr.shape[1]), where=valid_counts > 0)
+    winner_means = np.divide(np.where(mask_win, arr, 0.0).sum(axis=0), win_counts,
+                             out=np.zeros(arr.shape[1]), where=win_counts > 0)
+    all_means = np.divide(np.where(mask_valid, arr, 0.0).sum(axis=0), valid_counts,
+                          out=np.full(arr.shape[1], np.nan), where=valid_counts > 0)
 
-    avg_return_winners_30d = winners_30d.mean() if len(winners_30d) > 0 else 0
-    avg_return_winners_90d = winners_90d.mean() if len(winners_90d) > 0 else 0
-    avg_return_winners_180d = winners_180d.mean() if len(winners_180d) > 0 else 0
-
-    # Calculate overall average returns (all trades)
-    avg_return_all_90d = results['return_90d'].mean()
-    avg_return_all_180d = results['return_180d'].mean()
+    win_rate_30d, win_rate_60d, win_rate_90d, win_rate_180d = (float(x) for x in win_rates)
+    avg_return_winners_30d, _, avg_return_winners_90d, avg_return_winners_180d = (float(x) for x in winner_means)
+    _, _, avg_return_all_90d, avg_return_all_180d = (float(x) for x in all_means)
 
     logger.info(f"\nTotal signals analyzed: {total_signals}")
     logger.info(f"\nWin Rates:")
@@ -409,13 +598,14 @@ def main():
     logger.info("Starting EVA-Finance Phase 0 Historical Backtest")
 
     # Step 1: Detect historical trends
-    trends = detect_historical_trends(min_increase=2.0, min_baseline_mentions=5)
+    trends = detect_historical_trends(min_baseline_mentions=5)
 
     if len(trends) < 5:
         logger.warning(f"Only found {len(trends)} trends - may need more historical data or lower thresholds")
 
-    # Step 2: Run backtest
-    results = run_backtest(trends)
+    # Step 2: Run backtest against one bulk price download
+    prices = download_prices(trends)
+    results = run_backtest(trends, prices)
 
     # Step 3: Analyze results
     analysis = analyze_results(results)
@@ -433,6 +623,9 @@ def main():
     logger.info(f"  CSV: {results_file}")
     logger.info(f"  Analysis: {analysis_file}")
 
+    if _pool is not None:
+        _pool.closeall()
+
 
 if __name__ == '__main__':
     main()
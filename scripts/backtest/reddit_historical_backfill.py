@@ -6,10 +6,17 @@ Inserts into raw_messages table for validation backtesting
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import psycopg2
-from datetime import datetime, timedelta
-from typing import List, Dict
+import io
+import csv
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from psycopg2.pool import ThreadedConnectionPool
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Tuple
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -41,7 +48,54 @@ END_DATE = datetime.now() - timedelta(days=30)  # End 1 month ago
 START_DATE = END_DATE - timedelta(days=365)  # Go back 12 months from there
 
 PUSHSHIFT_API = "https://api.pushshift.io/reddit/search/submission/"
-RATE_LIMIT_DELAY = 0.5  # 2 requests per second (conservative for Pushshift)
+RATE_LIMIT_DELAY = 0.5  # 2 requests per second across all workers (conservative for Pushshift)
+
+# Author/selftext placeholders Reddit uses for deleted or removed posts
+DEAD_MARKERS = frozenset(('[deleted]', '[removed]'))
+MIN_SCORE = 5  # Skip low-quality posts
+
+
+def create_http_session() -> requests.Session:
+    """
+    Build a keep-alive session shared by all backfill workers
+
+    The connection pool is sized to the subreddit worker count so every
+    thread can reuse its TLS connection; transient 5xx/429s are retried.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=len(SUBREDDITS), pool_maxsize=len(SUBREDDITS), max_retries=retry)
+    session.mount('https://', adapter)
+    return session
+
+
+SESSION = create_http_session()
+
+
+class RateLimiter:
+    """
+    Space requests at least `interval` seconds apart across all threads
+
+    Each caller reserves the next free slot under the lock, then sleeps
+    outside it, so the aggregate rate stays at 1/interval however many
+    subreddit workers are running.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+RATE_LIMITER = RateLimiter(RATE_LIMIT_DELAY)
 
 
 def fetch_posts_batch(subreddit: str, after: int, before: int, size: int = 100) -> List[Dict]:
@@ -66,8 +120,9 @@ def fetch_posts_batch(subreddit: str, after: int, before: int, size: int = 100)
         'sort_type': 'asc'
     }
 
+    RATE_LIMITER.wait()
     try:
-        response = requests.get(PUSHSHIFT_API, params=params, timeout=30)
+        response = SESSION.get(PUSHSHIFT_API, params=params, timeout=30)
         response.raise_for_status()
         data = response.json()
         return data.get('data', [])
@@ -76,17 +131,44 @@ def fetch_posts_batch(subreddit: str, after: int, before: int, size: int = 100)
         return []
 
 
-def insert_post_to_db(conn, post: Dict, subreddit: str):
+# Per-connection staging table; ON COMMIT DELETE ROWS empties it after every batch
+CREATE_STAGING_QUERY = """
+    CREATE TEMP TABLE IF NOT EXISTS raw_messages_staging (
+        source TEXT,
+        platform_id TEXT,
+        timestamp TIMESTAMPTZ,
+        text TEXT,
+        url TEXT,
+        meta JSONB,
+        processed BOOLEAN
+    ) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGING_QUERY = """
+    COPY raw_messages_staging (source, platform_id, timestamp, text, url, meta, processed)
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+MERGE_STAGING_QUERY = """
+    INSERT INTO raw_messages (source, platform_id, timestamp, text, url, meta, processed)
+    SELECT DISTINCT ON (source, platform_id)
+        source, platform_id, timestamp, text, url, meta, processed
+    FROM raw_messages_staging
+    ON CONFLICT (source, platform_id) DO NOTHING
+"""
+
+
+def build_post_row(post: Dict, subreddit: str) -> Optional[Tuple]:
     """
-    Insert a post into raw_messages table
+    Convert a Pushshift post into a raw_messages row
 
     Args:
-        conn: Database connection
         post: Post data from Pushshift
         subreddit: Subreddit name
-    """
-    cursor = conn.cursor()
 
+    Returns:
+        Row tuple for COPY_STAGING_QUERY, or None if the post is filtered out
+    """
     # Extract post data
     post_id = post.get('id')
     title = post.get('title', '')
@@ -96,19 +178,15 @@ def insert_post_to_db(conn, post: Dict, subreddit: str):
     created_utc = post.get('created_utc')
     url = post.get('url', '')
 
+    # Skip deleted/removed and low-quality posts
+    if author in DEAD_MARKERS or selftext in DEAD_MARKERS or score < MIN_SCORE:
+        return None
+
     # Combine title and selftext for full content
     text = f"{title}\n\n{selftext}".strip()
 
-    # Skip deleted/removed posts
-    if author == '[deleted]' or author == '[removed]':
-        return
-    if selftext in ['[deleted]', '[removed]']:
-        return
-    if score < 5:  # Skip low-quality posts
-        return
-
-    # Convert timestamp
-    timestamp = datetime.fromtimestamp(created_utc)
+    # created_utc is epoch seconds; keep it tz-aware UTC for the TIMESTAMPTZ column
+    timestamp = datetime.fromtimestamp(created_utc, tz=timezone.utc)
 
     # Prepare metadata
     meta = {
@@ -118,41 +196,52 @@ def insert_post_to_db(conn, post: Dict, subreddit: str):
         'post_id': post_id
     }
 
-    # Insert into database
-    insert_query = """
-        INSERT INTO raw_messages (source, platform_id, timestamp, text, url, meta, processed)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (source, platform_id) DO NOTHING
+    return ('reddit', f"r/{subreddit}/{post_id}", timestamp, text, url, json.dumps(meta, separators=(',', ':')), False)
+
+
+def insert_posts_to_db(conn, cursor, rows: List[Tuple]) -> bool:
     """
+    Bulk-load a batch of rows into raw_messages with a single commit
+
+    Args:
+        conn: Database connection
+        cursor: Cursor reused for the whole subreddit
+        rows: Row tuples from build_post_row
+
+    Returns:
+        True if the batch was committed
+    """
+    if not rows:
+        return True
+
+    buf = io.StringIO()
+    csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buf.seek(0)
 
     try:
-        cursor.execute(
-            insert_query,
-            ('reddit', f"r/{subreddit}/{post_id}", timestamp, text, url, psycopg2.extras.Json(meta), False)
-        )
+        # COPY into the staging table, then merge so duplicates are still skipped
+        cursor.copy_expert(COPY_STAGING_QUERY, buf)
+        cursor.execute(MERGE_STAGING_QUERY)
         conn.commit()
-        logger.info(f"Inserted post {post_id} from r/{subreddit} ({timestamp})")
+        return True
     except Exception as e:
-        logger.error(f"Error inserting post {post_id}: {e}")
+        logger.error(f"Error inserting batch of {len(rows)} posts: {e}")
         conn.rollback()
-    finally:
-        cursor.close()
+        return False
 
 
-def backfill_subreddit(subreddit: str, start_date: datetime, end_date: datetime):
+def backfill_subreddit(pool: ThreadedConnectionPool, subreddit: str, start_date: datetime, end_date: datetime):
     """
     Backfill historical posts for a single subreddit
 
     Args:
+        pool: Connection pool shared by the backfill workers
         subreddit: Subreddit name
         start_date: Start of historical range
         end_date: End of historical range
     """
     logger.info(f"Starting backfill for r/{subreddit} from {start_date} to {end_date}")
 
-    # Connect to database
-    conn = psycopg2.connect(**DB_CONFIG)
-
     # Convert dates to Unix timestamps
     after_ts = int(start_date.timestamp())
     before_ts = int(end_date.timestamp())
@@ -160,29 +249,36 @@ def backfill_subreddit(subreddit: str, start_date: datetime, end_date: datetime)
     total_posts = 0
     current_after = after_ts
 
-    while current_after < before_ts:
-        # Fetch batch
-        posts = fetch_posts_batch(subreddit, current_after, before_ts, size=100)
+    # Borrow a connection; one cursor serves every batch for this subreddit.
+    # It goes back to the pool even if the staging setup fails, and putconn
+    # rolls back whatever transaction was left open
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_QUERY)
+            conn.commit()
 
-        if not posts:
-            logger.warning(f"No more posts returned for r/{subreddit}")
-            break
+            while current_after < before_ts:
+                # Fetch batch
+                posts = fetch_posts_batch(subreddit, current_after, before_ts, size=100)
 
-        # Insert each post
-        for post in posts:
-            insert_post_to_db(conn, post, subreddit)
-            total_posts += 1
+                if not posts:
+                    logger.warning(f"No more posts returned for r/{subreddit}")
+                    break
 
-        # Update cursor for next batch (use last post's timestamp + 1)
-        last_post_ts = posts[-1].get('created_utc', current_after)
-        current_after = last_post_ts + 1
+                # Filter and insert the whole batch in one round-trip
+                rows = [row for row in (build_post_row(post, subreddit) for post in posts) if row]
+                if insert_posts_to_db(conn, cursor, rows):
+                    total_posts += len(rows)
 
-        logger.info(f"r/{subreddit}: Processed batch, total posts: {total_posts}, current: {datetime.fromtimestamp(current_after)}")
+                # Update cursor for next batch (use last post's timestamp + 1)
+                last_post_ts = posts[-1].get('created_utc', current_after)
+                current_after = last_post_ts + 1
 
-        # Rate limiting
-        time.sleep(RATE_LIMIT_DELAY)
+                logger.info(f"r/{subreddit}: Processed batch, total posts: {total_posts}, current: {datetime.fromtimestamp(current_after)}")
+    finally:
+        pool.putconn(conn)
 
-    conn.close()
     logger.info(f"Completed backfill for r/{subreddit}: {total_posts} posts inserted")
 
 
@@ -196,12 +292,22 @@ def main():
     logger.info(f"Subreddits: {', '.join(SUBREDDITS)}")
     logger.info("=" * 60)
 
-    for subreddit in SUBREDDITS:
-        try:
-            backfill_subreddit(subreddit, START_DATE, END_DATE)
-        except Exception as e:
-            logger.error(f"Error backfilling r/{subreddit}: {e}")
-            continue
+    # Subreddits are independent I/O-bound streams; each worker borrows its own
+    # connection, and all of them share RATE_LIMITER's 2 req/s budget
+    pool = ThreadedConnectionPool(1, len(SUBREDDITS), **DB_CONFIG)
+
+    with ThreadPoolExecutor(max_workers=len(SUBREDDITS)) as executor:
+        futures = {
+            executor.submit(backfill_subreddit, pool, subreddit, START_DATE, END_DATE): subreddit
+            for subreddit in SUBREDDITS
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error backfilling r/{futures[future]}: {e}")
+
+    pool.closeall()
 
     logger.info("=" * 60)
     logger.info("Backfill complete!")
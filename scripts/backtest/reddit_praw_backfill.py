@@ -6,12 +6,15 @@ Pulls top 1000 posts from past year per subreddit
 """
 
 import praw
-import psycopg2
-import psycopg2.extras
-from datetime import datetime, timedelta
+import io
+import csv
+import json
+from psycopg2.pool import ThreadedConnectionPool
+from datetime import datetime, timedelta, timezone
 import logging
-import time
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -38,6 +41,12 @@ SUBREDDITS = [
     'onebag'
 ]
 
+BATCH_PAGE_SIZE = 500  # Rows per COPY batch / commit
+
+# Author/selftext placeholders Reddit uses for deleted or removed posts
+DEAD_MARKERS = frozenset(('[deleted]', '[removed]'))
+MIN_SCORE = 5  # Skip low-quality posts
+
 def load_credentials():
     """Load Reddit API credentials from .env file"""
     creds_file = Path(__file__).parent / 'reddit_credentials.env'
@@ -73,7 +82,8 @@ def create_reddit_client():
     reddit = praw.Reddit(
         client_id=creds['REDDIT_CLIENT_ID'],
         client_secret=creds['REDDIT_CLIENT_SECRET'],
-        user_agent=creds['REDDIT_USER_AGENT']
+        user_agent=creds['REDDIT_USER_AGENT'],
+        ratelimit_seconds=600  # Let PRAW sleep through Reddit's rate-limit windows
     )
 
     # Test connection
@@ -85,32 +95,67 @@ def create_reddit_client():
     logger.info("Reddit API client initialized successfully")
     return reddit
 
-def insert_post_to_db(conn, post, subreddit_name):
-    """Insert a Reddit post into raw_messages table"""
-    cursor = conn.cursor()
+# PRAW instances are not thread-safe (shared session and rate limiter), so
+# every backfill thread gets its own
+_thread_local = threading.local()
+
+def get_reddit_client():
+    """Return this thread's PRAW Reddit client, creating it on first use"""
+    reddit = getattr(_thread_local, 'reddit', None)
+    if reddit is None:
+        reddit = _thread_local.reddit = create_reddit_client()
+    return reddit
 
-    # Extract post data
-    post_id = post.id
-    title = post.title
-    selftext = getattr(post, 'selftext', '')
-    author = str(post.author) if post.author else '[deleted]'
-    score = post.score
-    created_utc = post.created_utc
-    url = post.url
+# Per-connection staging table; ON COMMIT DELETE ROWS empties it after every batch
+CREATE_STAGING_QUERY = """
+    CREATE TEMP TABLE IF NOT EXISTS raw_messages_staging (
+        source TEXT,
+        platform_id TEXT,
+        timestamp TIMESTAMPTZ,
+        text TEXT,
+        url TEXT,
+        meta JSONB,
+        processed BOOLEAN
+    ) ON COMMIT DELETE ROWS
+"""
+
+COPY_STAGING_QUERY = """
+    COPY raw_messages_staging (source, platform_id, timestamp, text, url, meta, processed)
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+MERGE_STAGING_QUERY = """
+    INSERT INTO raw_messages (source, platform_id, timestamp, text, url, meta, processed)
+    SELECT DISTINCT ON (source, platform_id)
+        source, platform_id, timestamp, text, url, meta, processed
+    FROM raw_messages_staging
+    ON CONFLICT (source, platform_id) DO NOTHING
+    RETURNING id
+"""
+
+def build_post_row(post, subreddit_name):
+    """Convert a Reddit post into a raw_messages row, or None if filtered out"""
+    # Read only what the listing already populated; attribute access on a
+    # missing field makes PRAW lazily re-fetch the whole submission
+    attrs = vars(post)
+    post_id = attrs['id']
+    title = attrs.get('title', '')
+    selftext = attrs.get('selftext', '')
+    author = str(attrs['author']) if attrs.get('author') else '[deleted]'
+    score = attrs.get('score', 0)
+    created_utc = attrs['created_utc']
+    url = attrs.get('url', '')
+    num_comments = attrs.get('num_comments', 0)
+
+    # Skip deleted/removed and low-quality posts
+    if author in DEAD_MARKERS or selftext in DEAD_MARKERS or score < MIN_SCORE:
+        return None
 
     # Combine title and selftext
     text = f"{title}\n\n{selftext}".strip()
 
-    # Skip deleted/removed posts
-    if author in ['[deleted]', '[removed]']:
-        return False
-    if selftext in ['[deleted]', '[removed]']:
-        return False
-    if score < 5:  # Skip low-quality posts
-        return False
-
-    # Convert timestamp
-    timestamp = datetime.fromtimestamp(created_utc)
+    # created_utc is epoch seconds; keep it tz-aware UTC for the TIMESTAMPTZ column
+    timestamp = datetime.fromtimestamp(created_utc, tz=timezone.utc)
 
     # Prepare metadata
     meta = {
@@ -118,75 +163,85 @@ def insert_post_to_db(conn, post, subreddit_name):
         'author': author,
         'score': score,
         'post_id': post_id,
-        'num_comments': post.num_comments
+        'num_comments': num_comments
     }
 
-    # Insert into database
-    insert_query = """
-        INSERT INTO raw_messages (source, platform_id, timestamp, text, url, meta, processed)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (source, platform_id) DO NOTHING
-        RETURNING id
-    """
+    return ('reddit', f"r/{subreddit_name}/{post_id}", timestamp, text, url,
+            json.dumps(meta, separators=(',', ':')), False)
 
-    try:
-        cursor.execute(
-            insert_query,
-            ('reddit', f"r/{subreddit_name}/{post_id}", timestamp, text, url,
-             psycopg2.extras.Json(meta), False)
-        )
-        result = cursor.fetchone()
-        conn.commit()
+def insert_posts_to_db(conn, cursor, rows):
+    """Bulk-load a batch of rows with a single commit; returns the number newly inserted"""
+    if not rows:
+        return 0
 
-        if result:
-            logger.info(f"Inserted post {post_id} from r/{subreddit_name} ({timestamp.date()}, {score} upvotes)")
-            return True
-        else:
-            logger.debug(f"Post {post_id} already exists, skipping")
-            return False
+    buf = io.StringIO()
+    csv.writer(buf, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    buf.seek(0)
 
+    try:
+        # COPY into the staging table, then merge so duplicates are still skipped
+        cursor.copy_expert(COPY_STAGING_QUERY, buf)
+        cursor.execute(MERGE_STAGING_QUERY)
+        inserted = cursor.fetchall()
+        conn.commit()
+        return len(inserted)
     except Exception as e:
-        logger.error(f"Error inserting post {post_id}: {e}")
+        logger.error(f"Error inserting batch of {len(rows)} posts: {e}")
         conn.rollback()
-        return False
-    finally:
-        cursor.close()
+        return 0
 
-def backfill_subreddit(reddit, subreddit_name, time_filter='year', limit=1000):
+def backfill_subreddit(pool, subreddit_name, time_filter='year', limit=1000):
     """
     Backfill historical posts from a subreddit using PRAW
 
     Args:
-        reddit: PRAW Reddit instance
+        pool: Connection pool shared by the backfill workers
         subreddit_name: Name of subreddit
         time_filter: 'day', 'week', 'month', 'year', 'all'
         limit: Max posts to fetch (PRAW max is ~1000)
     """
     logger.info(f"Starting backfill for r/{subreddit_name} (top {limit} posts from past {time_filter})")
 
-    conn = psycopg2.connect(**DB_CONFIG)
-    subreddit = reddit.subreddit(subreddit_name)
-
     inserted_count = 0
     skipped_count = 0
+    rows = []
 
+    # The connection goes back to the pool even if setup fails; putconn rolls
+    # back whatever transaction was left open
+    conn = pool.getconn()
     try:
-        # Get top posts from time period
-        for post in subreddit.top(time_filter=time_filter, limit=limit):
-            if insert_post_to_db(conn, post, subreddit_name):
-                inserted_count += 1
-            else:
-                skipped_count += 1
-
-            # Rate limiting courtesy
-            time.sleep(0.1)
-
-        logger.info(f"r/{subreddit_name}: Inserted {inserted_count}, Skipped {skipped_count}")
-
-    except Exception as e:
-        logger.error(f"Error fetching from r/{subreddit_name}: {e}")
+        with conn.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_QUERY)
+            conn.commit()
+            subreddit = get_reddit_client().subreddit(subreddit_name)
+
+            def flush():
+                nonlocal inserted_count, skipped_count
+                inserted = insert_posts_to_db(conn, cursor, rows)
+                inserted_count += inserted
+                skipped_count += len(rows) - inserted
+                rows.clear()
+
+            try:
+                # Get top posts from time period, buffering rows for batched inserts
+                for post in subreddit.top(time_filter=time_filter, limit=limit):
+                    row = build_post_row(post, subreddit_name)
+                    if row is None:
+                        skipped_count += 1
+                    else:
+                        rows.append(row)
+                        if len(rows) >= BATCH_PAGE_SIZE:
+                            flush()
+
+                flush()
+                logger.info(f"r/{subreddit_name}: Inserted {inserted_count}, Skipped {skipped_count}")
+
+            except Exception as e:
+                logger.error(f"Error fetching from r/{subreddit_name}: {e}")
+                # Keep whatever was fetched before the API error
+                flush()
     finally:
-        conn.close()
+        pool.putconn(conn)
 
     return inserted_count, skipped_count
 
@@ -197,24 +252,29 @@ def main():
     logger.info(f"Subreddits: {', '.join(SUBREDDITS)}")
     logger.info("=" * 60)
 
-    # Initialize Reddit client
-    reddit = create_reddit_client()
+    # Fail fast on missing credentials; each worker thread builds its own client
+    load_credentials()
 
     total_inserted = 0
     total_skipped = 0
 
-    for subreddit_name in SUBREDDITS:
-        try:
-            inserted, skipped = backfill_subreddit(reddit, subreddit_name)
-            total_inserted += inserted
-            total_skipped += skipped
-
-            # Rate limiting between subreddits
-            time.sleep(2)
-
-        except Exception as e:
-            logger.error(f"Failed to backfill r/{subreddit_name}: {e}")
-            continue
+    # Each worker uses its own PRAW client and borrows its own DB connection
+    pool = ThreadedConnectionPool(1, len(SUBREDDITS), **DB_CONFIG)
+
+    with ThreadPoolExecutor(max_workers=len(SUBREDDITS)) as executor:
+        futures = {
+            executor.submit(backfill_subreddit, pool, subreddit_name): subreddit_name
+            for subreddit_name in SUBREDDITS
+        }
+        for future in as_completed(futures):
+            try:
+                inserted, skipped = future.result()
+                total_inserted += inserted
+                total_skipped += skipped
+            except Exception as e:
+                logger.error(f"Failed to backfill r/{futures[future]}: {e}")
+
+    pool.closeall()
 
     logger.info("=" * 60)
     logger.info(f"Backfill complete!")
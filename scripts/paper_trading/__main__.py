@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Paper Trading Pipeline
+
+Package entry point for the combined daily run; see paper_trade_daily.py.
+
+Usage:
+    python scripts/paper_trading
+"""
+
+from paper_trade_daily import main
+
+
+if __name__ == '__main__':
+    main()
@@ -19,8 +19,8 @@ Schedule:
 
 import os
 import sys
-from datetime import datetime, date
-from typing import List, Dict, Optional
+from datetime import datetime
+from typing import List, Dict
 import logging
 
 import psycopg2
@@ -48,208 +48,105 @@ PROFIT_TARGET_PCT = 15.0
 STOP_LOSS_PCT = -10.0
 
 
-def get_positions_for_exit_check(conn) -> List[Dict]:
-    """
-    Fetch open positions with current prices for exit checking
-
-    Returns:
-        List of position dictionaries with computed metrics
-    """
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-    query = """
+# Close every open position that meets an exit rule in one statement.
+# Priority matches the rules above: time exit, then profit target, then stop loss.
+EXIT_QUERY = """
+    WITH candidates AS (
         SELECT
             id,
-            ticker,
-            brand,
-            tag,
-            entry_date,
-            entry_price,
-            current_price,
-            position_size,
-            signal_confidence,
-            CURRENT_DATE - entry_date AS days_held,
-            CASE
-                WHEN current_price IS NOT NULL AND entry_price > 0
-                THEN ((current_price - entry_price) / entry_price) * 100
-                ELSE NULL
-            END AS return_pct
+            CURRENT_DATE - entry_date AS held,
+            ((current_price - entry_price) / entry_price) * 100 AS ret
         FROM paper_trades
         WHERE status = 'open'
         AND current_price IS NOT NULL  -- Need price to evaluate
-        ORDER BY days_held DESC
-    """
-
-    cursor.execute(query)
-    results = cursor.fetchall()
-    cursor.close()
-
-    logger.info(f"Checking {len(results)} open positions for exit conditions")
-    return results
+        AND entry_price > 0
+    )
+    UPDATE paper_trades pt
+    SET
+        status = 'closed',
+        exit_date = CURRENT_DATE,
+        exit_price = pt.current_price,
+        exit_reason = CASE
+            WHEN c.held >= %(max_hold_days)s THEN 'time_exit'
+            WHEN c.ret >= %(profit_target)s THEN 'profit_target'
+            ELSE 'stop_loss'
+        END,
+        days_held = c.held,
+        return_pct = c.ret,
+        return_dollar = c.ret / 100 * pt.position_size,
+        updated_at = NOW()
+    FROM candidates c
+    WHERE pt.id = c.id
+    AND (
+        c.held >= %(max_hold_days)s
+        OR c.ret >= %(profit_target)s
+        OR c.ret <= %(stop_loss)s
+    )
+    RETURNING pt.id, pt.ticker, pt.brand, pt.days_held, pt.return_pct, pt.exit_reason
+"""
 
 
-def check_exit_condition(position: Dict) -> Optional[str]:
+def close_exited_positions(conn) -> List[Dict]:
     """
-    Evaluate whether position meets any exit criteria
-
-    Args:
-        position: Position dictionary with metrics
+    Close all open positions meeting exit criteria in a single UPDATE
 
     Returns:
-        Exit reason if should exit, None otherwise
+        List of closed position dictionaries (id, ticker, brand, days_held,
+        return_pct, exit_reason), longest-held first
     """
-    days_held = position['days_held']
-    return_pct = position['return_pct']
-
-    if return_pct is None:
-        return None
-
-    # Time-based exit (highest priority)
-    if days_held >= MAX_HOLD_DAYS:
-        return 'time_exit'
-
-    # Profit target
-    if return_pct >= PROFIT_TARGET_PCT:
-        return 'profit_target'
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
 
-    # Stop loss
-    if return_pct <= STOP_LOSS_PCT:
-        return 'stop_loss'
+    try:
+        cursor.execute(EXIT_QUERY, {
+            'max_hold_days': MAX_HOLD_DAYS,
+            'profit_target': PROFIT_TARGET_PCT,
+            'stop_loss': STOP_LOSS_PCT
+        })
+        closed = cursor.fetchall()
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Error closing positions: {e}")
+        return []
+    finally:
+        cursor.close()
 
-    return None
+    return sorted(closed, key=lambda position: position['days_held'], reverse=True)
 
 
-def close_position(
-    conn,
-    position_id: int,
-    exit_price: float,
-    exit_reason: str,
-    exit_date: Optional[date] = None
-) -> bool:
+def process_exits(conn):
     """
-    Close a paper trading position
+    Main processing: close positions meeting exit criteria and log them
 
     Args:
-        conn: Database connection
-        position_id: Paper trade ID
-        exit_price: Price at exit
-        exit_reason: Reason for exit
-        exit_date: Exit date (defaults to today)
-
-    Returns:
-        True if closed successfully
+        conn: Database connection (shared when run as part of the daily pipeline)
     """
-    if exit_date is None:
-        exit_date = date.today()
+    closed = close_exited_positions(conn)
 
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    exit_reasons = {}
 
-    # Get position details for calculation
-    cursor.execute(
-        """
-        SELECT entry_date, entry_price, position_size
-        FROM paper_trades
-        WHERE id = %s
-        """,
-        (position_id,)
-    )
-    position = cursor.fetchone()
+    for position in closed:
+        exit_reason = position['exit_reason']
+        exit_reasons[exit_reason] = exit_reasons.get(exit_reason, 0) + 1
 
-    if not position:
-        logger.error(f"Position {position_id} not found")
-        cursor.close()
-        return False
-
-    # Calculate performance
-    days_held = (exit_date - position['entry_date']).days
-    return_pct = ((exit_price - position['entry_price']) / position['entry_price']) * 100
-    return_dollar = (exit_price - position['entry_price']) / position['entry_price'] * position['position_size']
-
-    # Update position to closed
-    update_query = """
-        UPDATE paper_trades
-        SET
-            status = 'closed',
-            exit_date = %s,
-            exit_price = %s,
-            exit_reason = %s,
-            days_held = %s,
-            return_pct = %s,
-            return_dollar = %s,
-            updated_at = NOW()
-        WHERE id = %s
-    """
+        outcome = "WIN" if position['return_pct'] > 0 else "LOSS"
 
-    try:
-        cursor.execute(
-            update_query,
-            (exit_date, exit_price, exit_reason, days_held, return_pct, return_dollar, position_id)
+        logger.info(
+            "✓ Closed #%d: %s (%s) | %d days | %+.1f%% | %s | %s",
+            position['id'], position['brand'], position['ticker'],
+            position['days_held'], position['return_pct'], exit_reason, outcome
         )
-        conn.commit()
-        cursor.close()
-        return True
 
-    except Exception as e:
-        conn.rollback()
-        cursor.close()
-        logger.error(f"Error closing position {position_id}: {e}")
-        return False
-
-
-def process_exits():
-    """
-    Main processing loop: check positions and close those meeting exit criteria
-    """
-    conn = psycopg2.connect(**DB_CONFIG)
-
-    try:
-        # Get positions to check
-        positions = get_positions_for_exit_check(conn)
-
-        if not positions:
-            logger.info("No positions ready for exit check")
-            return
-
-        # Check each position
-        closed_count = 0
-        exit_reasons = {}
-
-        for position in positions:
-            exit_reason = check_exit_condition(position)
-
-            if exit_reason:
-                success = close_position(
-                    conn,
-                    position['id'],
-                    position['current_price'],
-                    exit_reason
-                )
-
-                if success:
-                    closed_count += 1
-                    exit_reasons[exit_reason] = exit_reasons.get(exit_reason, 0) + 1
-
-                    outcome = "WIN" if position['return_pct'] > 0 else "LOSS"
-
-                    logger.info(
-                        f"✓ Closed #{position['id']}: {position['brand']} ({position['ticker']}) "
-                        f"| {position['days_held']} days | {position['return_pct']:+.1f}% | "
-                        f"{exit_reason} | {outcome}"
-                    )
-
-        # Summary
-        if closed_count > 0:
-            logger.info(f"\n{closed_count} positions closed:")
-            for reason, count in exit_reasons.items():
-                logger.info(f"  {reason}: {count}")
-        else:
-            logger.info("No positions met exit criteria")
-
-        # Show updated performance
-        show_performance_summary(conn)
+    # Summary
+    if closed:
+        logger.info(f"\n{len(closed)} positions closed:")
+        for reason, count in exit_reasons.items():
+            logger.info(f"  {reason}: {count}")
+    else:
+        logger.info("No positions met exit criteria")
 
-    finally:
-        conn.close()
+    # Show updated performance
+    show_performance_summary(conn)
 
 
 def show_performance_summary(conn):
@@ -309,7 +206,11 @@ def main():
     logger.info("=" * 70)
 
     try:
-        process_exits()
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            process_exits(conn)
+        finally:
+            conn.close()
 
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
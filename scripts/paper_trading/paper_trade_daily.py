@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Paper Trade Daily Run
+
+Runs entry, price update and exit checks as one job: a single database
+connection, and a single yfinance request covering both the tickers of
+pending signals and the tickers of open positions.
+
+Usage:
+    python paper_trade_daily.py
+
+paper_trade_entry.py, paper_trade_updater.py and check_paper_exits.py
+remain runnable on their own.
+"""
+
+import sys
+from datetime import date
+import logging
+
+from eva_common.db import get_connection
+
+from paper_trade_entry import get_pending_signals, resolve_signal_tickers, enter_signals
+from paper_trade_updater import (
+    get_current_prices, get_open_tickers, get_open_positions, apply_price_updates
+)
+from check_paper_exits import process_exits
+
+logger = logging.getLogger(__name__)
+
+
+def run_daily(conn):
+    """
+    Run all three phases against one connection with one shared price map
+
+    Args:
+        conn: Database connection
+    """
+    pending = get_pending_signals(conn)
+    signal_tickers = resolve_signal_tickers(conn, pending)
+    open_tickers = get_open_tickers(conn)
+
+    tickers = {ticker for ticker in signal_tickers if ticker}
+    tickers.update(open_tickers)
+    price_map = get_current_prices(sorted(tickers))
+
+    if pending:
+        enter_signals(conn, pending, signal_tickers, price_map)
+    else:
+        logger.info("No pending signals for paper trading")
+
+    if open_tickers:
+        apply_price_updates(conn, get_open_positions(conn), price_map)
+    else:
+        logger.info("No open positions to update")
+
+    # Exit rules read the prices the update phase just wrote
+    process_exits(conn)
+
+
+def main():
+    """Entry point"""
+    logger.info("=" * 70)
+    logger.info(f"Paper Trade Daily Run - {date.today()}")
+    logger.info("=" * 70)
+
+    try:
+        with get_connection() as conn:
+            run_daily(conn)
+
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+        sys.exit(1)
+
+    logger.info("✓ Paper trade daily run complete")
+
+
+if __name__ == '__main__':
+    main()
@@ -14,10 +14,9 @@ Runs continuously or as a scheduled job to monitor for new tradeable signals.
 
 import sys
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 
-import psycopg2
 from psycopg2.extras import RealDictCursor
 import yfinance as yf
 
@@ -62,39 +61,57 @@ def get_ticker_for_brand(conn, brand: str) -> Optional[str]:
 
     if result:
         logger.debug(
-            f"Found ticker {result['ticker']} for {brand} "
-            f"({result['parent_company'] or 'direct'})"
+            "Found ticker %s for %s (%s)",
+            result['ticker'], brand, result['parent_company'] or 'direct'
         )
         return result['ticker']
 
     return None
 
 
-def get_current_price(ticker: str) -> Optional[float]:
+def get_current_prices(tickers: List[str]) -> Dict[str, float]:
     """
-    Fetch current stock price using yfinance
+    Fetch latest closing prices for several tickers in one yfinance request
 
     Args:
-        ticker: Stock ticker symbol
+        tickers: Stock ticker symbols
 
     Returns:
-        Current price or None if unavailable
+        Dict of ticker to price; tickers without data are omitted
     """
+    if not tickers:
+        return {}
+
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period='1d')
+        # A few days of history so a holiday or a late print still yields a close
+        data = yf.download(
+            tickers,
+            period='5d',
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            auto_adjust=False
+        )
+    except Exception as e:
+        logger.error(f"Error fetching prices for {', '.join(tickers)}: {e}")
+        return {}
 
-        if hist.empty:
-            logger.warning(f"No price data available for {ticker}")
-            return None
+    prices = {}
+    for ticker in tickers:
+        try:
+            closes = data[ticker]['Close'] if data.columns.nlevels > 1 else data['Close']
+        except KeyError:
+            closes = None
 
-        price = float(hist['Close'].iloc[-1])
-        logger.debug(f"{ticker} current price: ${price:.2f}")
-        return price
+        closes = closes.dropna() if closes is not None else None
+        if closes is None or closes.empty:
+            logger.warning("No price data available for %s", ticker)
+            continue
 
-    except Exception as e:
-        logger.error(f"Error fetching price for {ticker}: {e}")
-        return None
+        prices[ticker] = float(closes.iloc[-1])
+        logger.debug("%s current price: $%.2f", ticker, prices[ticker])
+
+    return prices
 
 
 def get_pending_signals(conn) -> list[Dict[str, Any]]:
@@ -114,9 +131,10 @@ def get_pending_signals(conn) -> list[Dict[str, Any]]:
             se.day AS signal_date,
             se.payload->>'final_confidence' AS confidence
         FROM signal_events se
-        LEFT JOIN paper_trades pt ON pt.signal_event_id = se.id
         WHERE se.event_type = 'RECOMMENDATION_ELIGIBLE'
-        AND pt.id IS NULL  -- No paper trade created yet
+        AND NOT EXISTS (  -- No paper trade created yet
+            SELECT 1 FROM paper_trades pt WHERE pt.signal_event_id = se.id
+        )
         ORDER BY se.day DESC
     """
 
@@ -128,28 +146,26 @@ def get_pending_signals(conn) -> list[Dict[str, Any]]:
     return results
 
 
-def create_paper_trade(conn, signal: Dict[str, Any]) -> Optional[int]:
+def create_paper_trade(conn, signal: Dict[str, Any], ticker: Optional[str],
+                       entry_price: Optional[float]) -> Optional[int]:
     """
     Create a paper trading position for a signal
 
     Args:
         conn: Database connection
         signal: Signal event dictionary
+        ticker: Ticker from brand_ticker_mapping, or None if untradeable
+        entry_price: Pre-fetched market price, or None if unavailable
 
     Returns:
         Paper trade ID if created, None if skipped
     """
-    brand = signal['brand']
-    ticker = get_ticker_for_brand(conn, brand)
-
     if ticker is None:
-        logger.info(f"⊘ Skipping {signal['brand']} - not publicly traded or immaterial")
+        logger.info("⊘ Skipping %s - not publicly traded or immaterial", signal['brand'])
         return None
 
-    # Get current price
-    entry_price = get_current_price(ticker)
     if entry_price is None:
-        logger.warning(f"⚠ Skipping {signal['brand']} ({ticker}) - price unavailable")
+        logger.warning("⚠ Skipping %s (%s) - price unavailable", signal['brand'], ticker)
         return None
 
     # Create paper trade
@@ -179,6 +195,7 @@ def create_paper_trade(conn, signal: Dict[str, Any]) -> Optional[int]:
             1000.00,  -- $1000 per position
             'open'
         )
+        ON CONFLICT (signal_event_id) DO NOTHING
         RETURNING id
     """
 
@@ -194,21 +211,23 @@ def create_paper_trade(conn, signal: Dict[str, Any]) -> Optional[int]:
             'confidence': signal.get('confidence')
         })
 
-        paper_trade_id = cursor.fetchone()[0]
+        row = cursor.fetchone()
         conn.commit()
 
+        if row is None:
+            # Another run already traded this signal (UNIQUE signal_event_id)
+            logger.warning("⊘ Duplicate paper trade for signal %s", signal['signal_event_id'])
+            return None
+
+        paper_trade_id = row[0]
+
         logger.info(
-            f"✓ Paper trade #{paper_trade_id}: {signal['brand']} ({ticker}) "
-            f"@ ${entry_price:.2f} | Signal: {signal['signal_date']}"
+            "✓ Paper trade #%d: %s (%s) @ $%.2f | Signal: %s",
+            paper_trade_id, signal['brand'], ticker, entry_price, signal['signal_date']
         )
 
         return paper_trade_id
 
-    except psycopg2.IntegrityError as e:
-        conn.rollback()
-        logger.warning(f"⊘ Duplicate paper trade for signal {signal['signal_event_id']}: {e}")
-        return None
-
     except Exception as e:
         conn.rollback()
         logger.error(f"✗ Error creating paper trade: {e}")
@@ -218,34 +237,72 @@ def create_paper_trade(conn, signal: Dict[str, Any]) -> Optional[int]:
         cursor.close()
 
 
-def process_pending_signals():
+def resolve_signal_tickers(conn, pending: List[Dict[str, Any]]) -> List[Optional[str]]:
     """
-    Main processing loop: find pending signals and create paper trades
+    Resolve the ticker for each pending signal, looking each distinct brand up once
+
+    Args:
+        conn: Database connection
+        pending: Signals from get_pending_signals
+
+    Returns:
+        Ticker (or None when untradeable) aligned with pending
+    """
+    # Several signals often share a brand
+    brand_tickers = {
+        brand: get_ticker_for_brand(conn, brand)
+        for brand in {signal['brand'] for signal in pending}
+    }
+    return [brand_tickers[signal['brand']] for signal in pending]
+
+
+def enter_signals(conn, pending: List[Dict[str, Any]], tickers: List[Optional[str]],
+                  price_map: Dict[str, float]) -> None:
     """
-    with get_connection() as conn:
-        # Get signals needing paper trades
-        pending = get_pending_signals(conn)
+    Create paper trades for pending signals using already-fetched prices
 
-        if not pending:
-            logger.info("No pending signals for paper trading")
-            return
+    Args:
+        conn: Database connection
+        pending: Signals from get_pending_signals
+        tickers: Tickers aligned with pending (from resolve_signal_tickers)
+        price_map: Ticker to current price
+    """
+    created_count = 0
+    skipped_count = 0
 
-        # Create paper trades
-        created_count = 0
-        skipped_count = 0
+    for signal, ticker in zip(pending, tickers):
+        result = create_paper_trade(conn, signal, ticker, price_map.get(ticker))
 
-        for signal in pending:
-            result = create_paper_trade(conn, signal)
+        if result:
+            created_count += 1
+        else:
+            skipped_count += 1
 
-            if result:
-                created_count += 1
-            else:
-                skipped_count += 1
+    logger.info(
+        f"Paper trade entry complete: "
+        f"{created_count} created, {skipped_count} skipped"
+    )
 
-        logger.info(
-            f"Paper trade entry complete: "
-            f"{created_count} created, {skipped_count} skipped"
-        )
+
+def process_pending_signals(conn):
+    """
+    Main processing loop: find pending signals and create paper trades
+
+    Args:
+        conn: Database connection (shared when run as part of the daily pipeline)
+    """
+    # Get signals needing paper trades
+    pending = get_pending_signals(conn)
+
+    if not pending:
+        logger.info("No pending signals for paper trading")
+        return
+
+    # Fetch every distinct ticker's price in one request
+    tickers = resolve_signal_tickers(conn, pending)
+    price_map = get_current_prices(sorted({ticker for ticker in tickers if ticker}))
+
+    enter_signals(conn, pending, tickers, price_map)
 
 
 def main():
@@ -255,7 +312,8 @@ def main():
     logger.info("=" * 70)
 
     try:
-        process_pending_signals()
+        with get_connection() as conn:
+            process_pending_signals(conn)
 
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
@@ -19,11 +19,12 @@ Designed to run daily at 4pm ET (market close + 30 min)
 import os
 import sys
 from datetime import datetime, date
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Iterator
 import logging
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import DECIMAL, new_type, register_type
+from psycopg2.extras import NamedTupleCursor, execute_batch
 import yfinance as yf
 
 # Setup logging
@@ -47,43 +48,93 @@ PROFIT_TARGET = 0.15  # 15% gain
 STOP_LOSS = -0.10     # -10% loss
 MAX_DAYS_HELD = 90    # 90 day time limit
 
+BATCH_PAGE_SIZE = 200  # Statements per execute_batch round-trip
+POSITION_FETCH_SIZE = 500  # Rows per server-side cursor fetch
 
-def get_current_price(ticker: str) -> Optional[float]:
+# NUMERIC columns read straight into float for the position stream, so the
+# per-row metric math needs no Decimal -> float conversions
+DEC2FLOAT = new_type(
+    DECIMAL.values, 'DEC2FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+
+
+def get_current_prices(tickers: List[str]) -> Dict[str, float]:
     """
-    Fetch current stock price using yfinance
+    Fetch latest closing prices for several tickers in one yfinance request
 
     Args:
-        ticker: Stock ticker symbol
+        tickers: Stock ticker symbols
 
     Returns:
-        Current price or None if unavailable
+        Dict of ticker to price; tickers without data are omitted
     """
+    if not tickers:
+        return {}
+
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period='1d')
+        # A few days of history so a holiday or a late print still yields a close
+        data = yf.download(
+            tickers,
+            period='5d',
+            group_by='ticker',
+            threads=True,
+            progress=False,
+            auto_adjust=False
+        )
+    except Exception as e:
+        logger.error(f"Error fetching prices for {', '.join(tickers)}: {e}")
+        return {}
 
-        if hist.empty:
-            logger.warning(f"No price data available for {ticker}")
-            return None
+    prices = {}
+    for ticker in tickers:
+        try:
+            closes = data[ticker]['Close'] if data.columns.nlevels > 1 else data['Close']
+        except KeyError:
+            closes = None
 
-        price = float(hist['Close'].iloc[-1])
-        logger.debug(f"{ticker} current price: ${price:.2f}")
-        return price
+        closes = closes.dropna() if closes is not None else None
+        if closes is None or closes.empty:
+            logger.warning("No price data available for %s", ticker)
+            continue
 
-    except Exception as e:
-        logger.error(f"Error fetching price for {ticker}: {e}")
-        return None
+        prices[ticker] = float(closes.iloc[-1])
+        logger.debug("%s current price: $%.2f", ticker, prices[ticker])
+
+    return prices
 
 
-def get_open_positions(conn) -> List[Dict[str, Any]]:
+def get_open_tickers(conn) -> List[str]:
     """
-    Retrieve all open paper trading positions
+    Retrieve the distinct tickers of all open positions
 
     Returns:
-        List of position dictionaries
+        Sorted list of ticker symbols
     """
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT DISTINCT ticker
+            FROM paper_trades
+            WHERE status = 'open'
+            ORDER BY ticker
+        """)
+        tickers = [row[0] for row in cursor]
+
+    logger.info(f"Found {len(tickers)} open tickers")
+    return tickers
 
+
+def get_open_positions(conn) -> Iterator[Any]:
+    """
+    Stream all open paper trading positions through a server-side cursor
+
+    Rows are fetched POSITION_FETCH_SIZE at a time, so memory stays flat
+    however many positions are open. The cursor lives in the caller's
+    transaction; commit only after the stream is exhausted.
+
+    Yields:
+        Position rows (namedtuples; fields read as attributes)
+    """
     query = """
         SELECT
             id,
@@ -100,28 +151,28 @@ def get_open_positions(conn) -> List[Dict[str, Any]]:
         ORDER BY entry_date ASC
     """
 
-    cursor.execute(query)
-    positions = cursor.fetchall()
-    cursor.close()
+    with conn.cursor(name='paper_open', cursor_factory=NamedTupleCursor) as cursor:
+        register_type(DEC2FLOAT, cursor)
+        cursor.itersize = POSITION_FETCH_SIZE
+        cursor.execute(query)
+        yield from cursor
 
-    logger.info(f"Found {len(positions)} open positions")
-    return positions
 
-
-def calculate_position_metrics(position: Dict[str, Any], current_price: float) -> Dict[str, Any]:
+def calculate_position_metrics(position: Any, current_price: float, today: date) -> Dict[str, Any]:
     """
     Calculate position performance metrics
 
     Args:
-        position: Position dictionary
+        position: Position row
         current_price: Current market price
+        today: Run date, resolved once by the caller
 
     Returns:
         Dictionary with calculated metrics
     """
-    entry_price = float(position['entry_price'])
-    position_size = float(position['position_size'])
-    days_held = (date.today() - position['entry_date']).days
+    entry_price = position.entry_price
+    position_size = position.position_size
+    days_held = (today - position.entry_date).days
 
     # Calculate shares (position_size is dollar amount)
     shares = position_size / entry_price
@@ -169,87 +220,85 @@ def check_exit_conditions(metrics: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def update_position(conn, position: Dict[str, Any], metrics: Dict[str, Any]) -> None:
-    """
-    Update open position with current metrics
-
-    Args:
-        conn: Database connection
-        position: Position dictionary
-        metrics: Current metrics
-    """
-    cursor = conn.cursor()
-
-    update_query = """
-        UPDATE paper_trades
-        SET
-            current_price = %(current_price)s,
-            days_held = %(days_held)s,
-            return_pct = %(return_pct)s,
-            return_dollar = %(return_dollar)s,
-            updated_at = NOW()
-        WHERE id = %(position_id)s
-    """
+# Prepared once per run so the server parses and plans each statement once,
+# not once per position; the EXECUTE strings below are what execute_batch sends
+PREPARE_UPDATE = """
+    PREPARE paper_update AS
+    UPDATE paper_trades
+    SET
+        current_price = $1,
+        days_held = $2,
+        return_pct = $3,
+        return_dollar = $4,
+        updated_at = NOW()
+    WHERE id = $5
+"""
 
-    cursor.execute(update_query, {
-        'current_price': metrics['current_price'],
-        'days_held': metrics['days_held'],
-        'return_pct': metrics['return_pct'],
-        'return_dollar': metrics['return_dollar'],
-        'position_id': position['id']
-    })
+PREPARE_CLOSE = """
+    PREPARE paper_close AS
+    UPDATE paper_trades
+    SET
+        status = 'closed',
+        exit_date = CURRENT_DATE,
+        exit_price = $1,
+        exit_reason = $2,
+        current_price = $1,
+        days_held = $3,
+        return_pct = $4,
+        return_dollar = $5,
+        updated_at = NOW()
+    WHERE id = $6
+"""
 
-    conn.commit()
-    cursor.close()
+UPDATE_QUERY = """
+    EXECUTE paper_update(
+        %(current_price)s, %(days_held)s, %(return_pct)s, %(return_dollar)s, %(position_id)s
+    )
+"""
 
-    logger.info(
-        f"Updated #{position['id']} {position['brand']} ({position['ticker']}): "
-        f"${metrics['current_price']:.2f} | "
-        f"{metrics['return_pct']*100:+.2f}% | "
-        f"${metrics['return_dollar']:+.2f} | "
-        f"{metrics['days_held']} days"
+CLOSE_QUERY = """
+    EXECUTE paper_close(
+        %(exit_price)s, %(exit_reason)s, %(days_held)s, %(return_pct)s,
+        %(return_dollar)s, %(position_id)s
     )
+"""
 
 
-def close_position(conn, position: Dict[str, Any], metrics: Dict[str, Any], exit_reason: str) -> None:
-    """
-    Close a position that met exit conditions
+def update_params(position: Any, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Bind parameters for UPDATE_QUERY"""
+    return {
+        'current_price': metrics['current_price'],
+        'days_held': metrics['days_held'],
+        'return_pct': metrics['return_pct'],
+        'return_dollar': metrics['return_dollar'],
+        'position_id': position.id
+    }
 
-    Args:
-        conn: Database connection
-        position: Position dictionary
-        metrics: Current metrics
-        exit_reason: Reason for exit
-    """
-    cursor = conn.cursor()
-
-    close_query = """
-        UPDATE paper_trades
-        SET
-            status = 'closed',
-            exit_date = CURRENT_DATE,
-            exit_price = %(exit_price)s,
-            exit_reason = %(exit_reason)s,
-            current_price = %(exit_price)s,
-            days_held = %(days_held)s,
-            return_pct = %(return_pct)s,
-            return_dollar = %(return_dollar)s,
-            updated_at = NOW()
-        WHERE id = %(position_id)s
-    """
 
-    cursor.execute(close_query, {
+def close_params(position: Any, metrics: Dict[str, Any], exit_reason: str) -> Dict[str, Any]:
+    """Bind parameters for CLOSE_QUERY"""
+    return {
         'exit_price': metrics['current_price'],
         'exit_reason': exit_reason,
         'days_held': metrics['days_held'],
         'return_pct': metrics['return_pct'],
         'return_dollar': metrics['return_dollar'],
-        'position_id': position['id']
-    })
+        'position_id': position.id
+    }
 
-    conn.commit()
-    cursor.close()
 
+def log_update(position: Any, metrics: Dict[str, Any]) -> None:
+    """Log an open position that was updated with current metrics"""
+    logger.info(
+        "Updated #%d %s (%s): $%.2f | %+.2f%% | $%+.2f | %d days",
+        position.id, position.brand, position.ticker,
+        metrics['current_price'], metrics['return_pct'] * 100,
+        metrics['return_dollar'], metrics['days_held']
+    )
+
+
+def log_close(position: Any, metrics: Dict[str, Any], exit_reason: str) -> None:
+    """Log a position that was closed on an exit condition"""
     exit_emoji = {
         'profit_target': '🎯',
         'stop_loss': '🛑',
@@ -257,70 +306,94 @@ def close_position(conn, position: Dict[str, Any], metrics: Dict[str, Any], exit
     }
 
     logger.info(
-        f"{exit_emoji.get(exit_reason, '✓')} CLOSED #{position['id']} {position['brand']} ({position['ticker']}): "
-        f"Entry ${float(position['entry_price']):.2f} → Exit ${metrics['current_price']:.2f} | "
-        f"{metrics['return_pct']*100:+.2f}% ({exit_reason}) | "
-        f"${metrics['return_dollar']:+.2f} | {metrics['days_held']} days"
+        "%s CLOSED #%d %s (%s): Entry $%.2f → Exit $%.2f | %+.2f%% (%s) | $%+.2f | %d days",
+        exit_emoji.get(exit_reason, '✓'), position.id, position.brand, position.ticker,
+        position.entry_price, metrics['current_price'], metrics['return_pct'] * 100,
+        exit_reason, metrics['return_dollar'], metrics['days_held']
     )
 
 
-def process_position(conn, position: Dict[str, Any]) -> Dict[str, str]:
+def process_position(position: Any, current_price: Optional[float], today: date) -> Dict[str, Any]:
     """
-    Process a single position: fetch price, update metrics, check exits
+    Process a single position: compute metrics, check exits
 
     Args:
-        conn: Database connection
-        position: Position dictionary
+        position: Position row
+        current_price: Pre-fetched market price, or None if unavailable
+        today: Run date, resolved once by the caller
 
     Returns:
-        Dictionary with action taken
+        Dictionary with action taken, plus position/metrics for the write
     """
-    # Fetch current price
-    current_price = get_current_price(position['ticker'])
-
     if current_price is None:
-        logger.warning(f"Skipping {position['brand']} - price unavailable")
+        logger.warning("Skipping %s - price unavailable", position.brand)
         return {'action': 'skipped', 'reason': 'no_price'}
 
     # Calculate metrics
-    metrics = calculate_position_metrics(position, current_price)
+    metrics = calculate_position_metrics(position, current_price, today)
 
     # Check exit conditions
     exit_reason = check_exit_conditions(metrics)
 
     if exit_reason:
-        close_position(conn, position, metrics, exit_reason)
-        return {'action': 'closed', 'reason': exit_reason}
+        return {'action': 'closed', 'reason': exit_reason, 'position': position, 'metrics': metrics}
     else:
-        update_position(conn, position, metrics)
-        return {'action': 'updated'}
+        return {'action': 'updated', 'position': position, 'metrics': metrics}
 
 
-def update_all_positions():
+def write_position_changes(cursor, actions: List[Dict[str, Any]]) -> None:
     """
-    Main processing loop: update all open positions
-    """
-    conn = psycopg2.connect(**DB_CONFIG)
+    Send one chunk of updates and closes with execute_batch, then log them
 
-    try:
-        # Get all open positions
-        positions = get_open_positions(conn)
+    Expects PREPARE_UPDATE and PREPARE_CLOSE to have run on the session;
+    the caller commits.
 
-        if not positions:
-            logger.info("No open positions to update")
-            return
+    Args:
+        cursor: Database cursor
+        actions: Results from process_position
+    """
+    open_updates = [
+        update_params(a['position'], a['metrics'])
+        for a in actions if a['action'] == 'updated'
+    ]
+    close_updates = [
+        close_params(a['position'], a['metrics'], a['reason'])
+        for a in actions if a['action'] == 'closed'
+    ]
+
+    execute_batch(cursor, UPDATE_QUERY, open_updates, page_size=BATCH_PAGE_SIZE)
+    execute_batch(cursor, CLOSE_QUERY, close_updates, page_size=BATCH_PAGE_SIZE)
+
+    for a in actions:
+        if a['action'] == 'updated':
+            log_update(a['position'], a['metrics'])
+        elif a['action'] == 'closed':
+            log_close(a['position'], a['metrics'], a['reason'])
+
+
+def apply_price_updates(conn, positions: Iterable[Any], price_map: Dict[str, float]) -> None:
+    """
+    Update or close open positions using already-fetched prices
 
-        # Process each position
-        results = {
-            'updated': 0,
-            'closed': 0,
-            'skipped': 0,
-            'closed_reasons': {}
-        }
+    Positions are processed and written in chunks of BATCH_PAGE_SIZE as they
+    stream in; everything commits in one transaction at the end.
 
-        for position in positions:
-            result = process_position(conn, position)
+    Args:
+        conn: Database connection
+        positions: Rows from get_open_positions
+        price_map: Ticker to current price
+    """
+    results = {
+        'updated': 0,
+        'closed': 0,
+        'skipped': 0,
+        'closed_reasons': {}
+    }
 
+    def flush(chunk):
+        write_position_changes(cursor, chunk)
+
+        for result in chunk:
             if result['action'] == 'updated':
                 results['updated'] += 1
             elif result['action'] == 'closed':
@@ -330,17 +403,62 @@ def update_all_positions():
             elif result['action'] == 'skipped':
                 results['skipped'] += 1
 
-        # Summary
-        logger.info("=" * 70)
-        logger.info(f"Update complete: {results['updated']} updated, {results['closed']} closed, {results['skipped']} skipped")
+    today = date.today()
+
+    with conn.cursor() as cursor:
+        # Prepared statements live for the session and survive a rollback, so
+        # they are always deallocated: a pooled connection must be able to
+        # prepare them again on its next run
+        prepared = []
+        try:
+            cursor.execute(PREPARE_UPDATE)
+            prepared.append('paper_update')
+            cursor.execute(PREPARE_CLOSE)
+            prepared.append('paper_close')
+
+            chunk = []
+            for position in positions:
+                chunk.append(process_position(position, price_map.get(position.ticker), today))
+                if len(chunk) >= BATCH_PAGE_SIZE:
+                    flush(chunk)
+                    chunk = []
+            flush(chunk)
+        except Exception:
+            # DEALLOCATE can't run in an aborted transaction
+            conn.rollback()
+            raise
+        finally:
+            for name in prepared:
+                cursor.execute(f"DEALLOCATE {name}")
+    conn.commit()
+
+    # Summary
+    logger.info("=" * 70)
+    logger.info(f"Update complete: {results['updated']} updated, {results['closed']} closed, {results['skipped']} skipped")
+
+    if results['closed_reasons']:
+        logger.info("Closed positions breakdown:")
+        for reason, count in results['closed_reasons'].items():
+            logger.info(f"  - {reason}: {count}")
+
+
+def update_all_positions(conn):
+    """
+    Main processing loop: update all open positions
+
+    Args:
+        conn: Database connection (shared when run as part of the daily pipeline)
+    """
+    # Fetch every distinct ticker's price in one request
+    tickers = get_open_tickers(conn)
+
+    if not tickers:
+        logger.info("No open positions to update")
+        return
 
-        if results['closed_reasons']:
-            logger.info("Closed positions breakdown:")
-            for reason, count in results['closed_reasons'].items():
-                logger.info(f"  - {reason}: {count}")
+    price_map = get_current_prices(tickers)
 
-    finally:
-        conn.close()
+    apply_price_updates(conn, get_open_positions(conn), price_map)
 
 
 def main():
@@ -351,7 +469,11 @@ def main():
     logger.info("=" * 70)
 
     try:
-        update_all_positions()
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            update_all_positions(conn)
+        finally:
+            conn.close()
 
     except Exception as e:
         logger.error(f"Fatal error: {e}", exc_info=True)
@@ -14,15 +14,18 @@ Schedule:
 
 import os
 import sys
-from datetime import datetime
+import json
+import fcntl
+from datetime import datetime, time as dt_time, timezone
 from typing import Dict, List
 import logging
 import time
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import yfinance as yf
 
+from eva_common.db import get_connection
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -30,50 +33,116 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Database configuration
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'db'),
-    'port': int(os.getenv('DB_PORT', '5432')),
-    'database': os.getenv('DB_NAME', 'eva_finance'),
-    'user': os.getenv('DB_USER', 'eva'),
-    'password': os.getenv('DB_PASSWORD', 'eva_password_change_me')
-}
+PRICE_CHUNK_SIZE = 20     # Yahoo caps symbols per request
+PRICE_FETCH_WORKERS = 4   # yfinance download threads per chunk; stays under Yahoo's rate limit
+
+# On-disk price cache so re-runs on the same day skip Yahoo
+PRICE_CACHE_DIR = os.getenv('PRICE_CACHE_DIR', os.path.expanduser('~/.cache/eva_finance/prices'))
+PRICE_CACHE_TTL_SECONDS = int(os.getenv('PRICE_CACHE_TTL_SECONDS', '900'))  # Intraday freshness
+MARKET_CLOSE_UTC = dt_time(21, 0)  # At or after 4pm ET year-round (cron uses UTC too)
 
 
-def get_open_positions(conn) -> List[Dict]:
+class PriceCache:
     """
-    Fetch all open paper trading positions
+    On-disk cache of fetched prices, one JSON file per UTC day.
 
-    Returns:
-        List of open position dictionaries
+    Prices fetched before market close stay fresh for PRICE_CACHE_TTL_SECONDS;
+    prices fetched after close are final and hold for the rest of the day.
+    Files are locked with fcntl.flock so overlapping cron runs can't corrupt them.
+    File format: {ticker: [price, fetched_at_epoch]}
     """
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
 
+    def __init__(self, cache_dir: str = PRICE_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, now: datetime) -> str:
+        return os.path.join(self.cache_dir, f"{now:%Y-%m-%d}.json")
+
+    @staticmethod
+    def _load(f) -> Dict[str, List[float]]:
+        try:
+            return json.load(f)
+        except ValueError:  # Empty or half-written file
+            return {}
+
+    @staticmethod
+    def _is_fresh(fetched_at: float, now: datetime) -> bool:
+        market_close = datetime.combine(now.date(), MARKET_CLOSE_UTC, tzinfo=timezone.utc)
+        fetched = datetime.fromtimestamp(fetched_at, tz=timezone.utc)
+        return fetched >= market_close or (now - fetched).total_seconds() < PRICE_CACHE_TTL_SECONDS
+
+    def get_fresh(self, tickers: List[str]) -> Dict[str, float]:
+        """Return cached prices that are still fresh for the given tickers."""
+        now = datetime.now(timezone.utc)
+
+        try:
+            with open(self._path(now)) as f:
+                fcntl.flock(f, fcntl.LOCK_SH)
+                entries = self._load(f)
+        except FileNotFoundError:
+            return {}
+        except OSError as e:
+            logger.warning(f"[PRICE-CACHE] Read failed: {e}")
+            return {}
+
+        return {
+            ticker: entries[ticker][0]
+            for ticker in tickers
+            if ticker in entries and self._is_fresh(entries[ticker][1], now)
+        }
+
+    def update(self, prices: Dict[str, float]):
+        """Merge freshly fetched prices into today's cache file."""
+        if not prices:
+            return
+
+        now = datetime.now(timezone.utc)
+        fetched_at = now.timestamp()
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._path(now), 'a+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                entries = self._load(f)
+                entries.update({ticker: [price, fetched_at] for ticker, price in prices.items()})
+                f.seek(0)
+                f.truncate()
+                json.dump(entries, f)
+        except OSError as e:
+            logger.warning(f"[PRICE-CACHE] Write failed: {e}")
+
+
+PRICE_CACHE = PriceCache()
+
+
+def get_open_tickers(cursor) -> List[str]:
+    """
+    Fetch the distinct tickers of all open paper trading positions
+
+    Args:
+        cursor: RealDictCursor shared across the run
+
+    Returns:
+        Sorted list of ticker symbols
+    """
     query = """
-        SELECT
-            id,
-            ticker,
-            brand,
-            entry_date,
-            entry_price,
-            current_price,
-            position_size
+        SELECT DISTINCT ticker
         FROM paper_trades
         WHERE status = 'open'
-        ORDER BY ticker, entry_date
+        ORDER BY ticker
     """
 
     cursor.execute(query)
-    results = cursor.fetchall()
-    cursor.close()
+    tickers = [row['ticker'] for row in cursor.fetchall()]
 
-    logger.info(f"Found {len(results)} open positions to update")
-    return results
+    logger.info(f"Found {len(tickers)} open tickers to update")
+    return tickers
 
 
-def get_batch_prices(tickers: List[str]) -> Dict[str, float]:
+def fetch_price_chunk(tickers: List[str]) -> Dict[str, float]:
     """
-    Fetch current prices for multiple tickers efficiently
+    Fetch current prices for one chunk of tickers (at most PRICE_CHUNK_SIZE)
 
     Args:
         tickers: List of ticker symbols
@@ -89,25 +158,26 @@ def get_batch_prices(tickers: List[str]) -> Dict[str, float]:
         data = yf.download(
             ticker_string,
             period='1d',
-            progress=False
+            progress=False,
+            threads=PRICE_FETCH_WORKERS
         )
 
         if data.empty:
-            logger.warning("No price data returned from batch download")
+            logger.warning(f"No price data returned for {ticker_string}")
             return prices
 
-        # Handle single ticker vs multiple
-        if len(tickers) == 1:
-            if not data.empty:
-                prices[tickers[0]] = float(data['Close'].iloc[-1].iloc[0] if hasattr(data['Close'].iloc[-1], 'iloc') else data['Close'].iloc[-1])
-        else:
-            for ticker in tickers:
-                try:
-                    if ticker in data['Close'].columns:
-                        price = float(data['Close'][ticker].iloc[-1])
-                        prices[ticker] = price
-                except Exception as e:
-                    logger.warning(f"Could not extract price for {ticker}: {e}")
+        # Close is one column per ticker (a Series for a flat single-ticker
+        # frame); read the last row once as a NumPy array
+        close = data['Close']
+        if close.ndim == 1:
+            close = close.to_frame(tickers[0])
+
+        last = close.to_numpy()[-1]
+        prices = {
+            ticker: float(price)
+            for ticker, price in zip(close.columns, last)
+            if price == price  # Drop NaN (no print for that ticker)
+        }
 
     except Exception as e:
         logger.error(f"Batch download failed: {e}")
@@ -122,125 +192,174 @@ def get_batch_prices(tickers: List[str]) -> Dict[str, float]:
             except Exception as e2:
                 logger.warning(f"Failed to get price for {ticker}: {e2}")
 
-    logger.info(f"Successfully fetched {len(prices)}/{len(tickers)} prices")
     return prices
 
 
-def update_position_price(conn, position_id: int, new_price: float):
+def get_batch_prices(tickers: List[str]) -> Dict[str, float]:
     """
-    Update current price for a paper trading position
+    Fetch current prices for multiple tickers efficiently
+
+    Tickers with a fresh entry in PRICE_CACHE are served from disk. The rest
+    are split into chunks of PRICE_CHUNK_SIZE, Yahoo's per-request
+    symbol limit. Chunks run one after another because concurrent
+    yf.download calls share yfinance's module-level result store; within a
+    chunk yfinance fetches symbols on PRICE_FETCH_WORKERS threads.
 
     Args:
-        conn: Database connection
-        position_id: Paper trade ID
-        new_price: Current market price
+        tickers: List of ticker symbols
+
+    Returns:
+        Dictionary mapping ticker -> current price
     """
-    cursor = conn.cursor()
+    prices = PRICE_CACHE.get_fresh(tickers)
+    if prices:
+        logger.info(f"[PRICE-CACHE] HIT: {len(prices)}/{len(tickers)} tickers")
+
+    missing = [ticker for ticker in tickers if ticker not in prices]
+    chunks = [
+        missing[i:i + PRICE_CHUNK_SIZE]
+        for i in range(0, len(missing), PRICE_CHUNK_SIZE)
+    ]
+
+    fetched = {}
+    for chunk in chunks:
+        fetched.update(fetch_price_chunk(chunk))
+    PRICE_CACHE.update(fetched)
+    prices.update(fetched)
 
-    update_query = """
-        UPDATE paper_trades
-        SET current_price = %s,
+    logger.info(f"Successfully fetched {len(prices)}/{len(tickers)} prices")
+    return prices
+
+
+# One statement reprices every open position from a (ticker, price) VALUES list
+# and returns only what is worth logging: new positions and >2% daily moves.
+# The self-join on paper_trades reads each row's pre-update current_price.
+UPDATE_PRICES_QUERY = """
+    WITH v(ticker, price) AS (VALUES %s),
+    upd AS (
+        UPDATE paper_trades AS p
+        SET current_price = v.price,
             updated_at = NOW()
-        WHERE id = %s
+        FROM v, paper_trades AS old
+        WHERE p.status = 'open'
+          AND p.ticker = v.ticker
+          AND old.id = p.id
+        RETURNING
+            p.ticker,
+            p.brand,
+            old.current_price AS old_price,
+            v.price AS new_price,
+            CASE WHEN p.entry_price > 0
+                 THEN (v.price - p.entry_price) / p.entry_price * 100
+                 ELSE 0
+            END AS return_pct
+    ),
+    notable AS (
+        SELECT
+            ticker,
+            brand,
+            old_price,
+            new_price,
+            return_pct,
+            (new_price - old_price) / NULLIF(old_price, 0) * 100 AS price_change_pct
+        FROM upd
+        WHERE old_price IS NULL
+           OR old_price = 0
+           OR ABS((new_price - old_price) / NULLIF(old_price, 0) * 100) > 2
+    )
+    SELECT (SELECT COUNT(*) FROM upd) AS updated_count, notable.*
+    FROM (SELECT 1) AS one
+    LEFT JOIN notable ON true
+    ORDER BY notable.ticker, notable.brand
+"""
+
+
+def update_position_prices(cursor, prices: Dict[str, float]) -> List[Dict]:
     """
+    Update current prices for all open positions in one statement
 
-    try:
-        cursor.execute(update_query, (new_price, position_id))
-        conn.commit()
+    Args:
+        cursor: RealDictCursor shared across the run (caller commits)
+        prices: Ticker -> current market price
 
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Error updating position {position_id}: {e}")
+    Returns:
+        Rows carrying updated_count, plus one row per position worth logging
+        (notable columns are NULL when nothing moved enough to log)
+    """
+    # A large VALUES join can cross jit_above_cost, and JIT compile time
+    # dwarfs this statement's run time; keep it off for this transaction
+    cursor.execute("SET LOCAL jit = off")
 
-    finally:
-        cursor.close()
+    # A single page keeps the CTE (and its updated_count) to one statement
+    return execute_values(
+        cursor, UPDATE_PRICES_QUERY, list(prices.items()),
+        template="(%s, %s::numeric)", page_size=len(prices), fetch=True
+    )
 
 
 def update_all_prices():
     """
     Main update loop: fetch prices and update database
     """
-    conn = psycopg2.connect(**DB_CONFIG)
-
-    try:
-        # Get open positions
-        positions = get_open_positions(conn)
+    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        # Get unique tickers of open positions
+        tickers = get_open_tickers(cursor)
 
-        if not positions:
+        if not tickers:
             logger.info("No open positions to update")
             return
 
-        # Get unique tickers
-        tickers = list(set(p['ticker'] for p in positions))
         logger.info(f"Fetching prices for {len(tickers)} unique tickers")
 
         # Batch fetch prices
         prices = get_batch_prices(tickers)
 
-        # Update each position
-        updated_count = 0
-        failed_count = 0
-
-        for position in positions:
-            ticker = position['ticker']
+        missing = [ticker for ticker in tickers if ticker not in prices]
+        for ticker in missing:
+            logger.warning("⚠ No price data for %s", ticker)
 
-            if ticker not in prices:
-                logger.warning(f"⚠ No price data for {ticker} ({position['brand']})")
-                failed_count += 1
-                continue
-
-            new_price = prices[ticker]
-            old_price = float(position['current_price']) if position['current_price'] else None
-            entry_price = float(position['entry_price']) if position['entry_price'] else None
-
-            # Calculate return
-            if entry_price:
-                return_pct = ((new_price - entry_price) / entry_price) * 100
-            else:
-                return_pct = 0
+        # Update database; return math and the >2% filter run server-side
+        rows = update_position_prices(cursor, prices) if prices else []
+        conn.commit()
+        updated_count = rows[0]['updated_count'] if rows else 0
 
-            # Update database
-            update_position_price(conn, position['id'], new_price)
+        # Rows arrive after the commit; skip the loop outright if INFO is off
+        if logger.isEnabledFor(logging.INFO):
+            for row in rows:
+                if row['ticker'] is None:
+                    continue
 
-            # Log significant changes
-            if old_price:
-                price_change_pct = ((new_price - old_price) / old_price) * 100
-                if abs(price_change_pct) > 2:  # Log if >2% daily move
+                if row['old_price']:
                     logger.info(
-                        f"  {ticker} ({position['brand']}): "
-                        f"${old_price:.2f} → ${new_price:.2f} "
-                        f"({price_change_pct:+.1f}% today, {return_pct:+.1f}% total)"
+                        "  %s (%s): $%.2f → $%.2f (%+.1f%% today, %+.1f%% total)",
+                        row['ticker'], row['brand'], row['old_price'], row['new_price'],
+                        row['price_change_pct'], row['return_pct']
+                    )
+                else:
+                    logger.info(
+                        "  %s (%s): $%.2f (%+.1f%% total)",
+                        row['ticker'], row['brand'], row['new_price'], row['return_pct']
                     )
-            else:
-                logger.info(
-                    f"  {ticker} ({position['brand']}): ${new_price:.2f} "
-                    f"({return_pct:+.1f}% total)"
-                )
-
-            updated_count += 1
 
         logger.info(
             f"Price update complete: "
-            f"{updated_count} updated, {failed_count} failed"
+            f"{updated_count} updated, {len(missing)} tickers without price"
         )
 
         # Show summary stats
-        show_summary(conn)
-
-    finally:
-        conn.close()
+        show_summary(cursor)
 
 
-def show_summary(conn):
+def show_summary(cursor):
     """
     Display summary of current paper trading performance
-    """
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
 
+    Args:
+        cursor: RealDictCursor shared across the run
+    """
     query = "SELECT * FROM v_paper_trading_performance"
     cursor.execute(query)
     stats = cursor.fetchone()
-    cursor.close()
 
     if not stats:
         return
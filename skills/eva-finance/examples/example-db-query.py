@@ -11,10 +11,9 @@ Sources:
 - scripts/paper_trading/paper_trade_entry.py (transactions)
 """
 
-import json
 from typing import Optional, Dict, Any, List
 from contextlib import contextmanager
-from psycopg2.extras import RealDictCursor, Json
+from psycopg2.extras import RealDictCursor, Json, execute_values
 
 
 # ------------------------------------
@@ -112,10 +111,10 @@ def create_signal_event(
             cur.execute(
                 """
                 INSERT INTO signal_events (event_type, tag, brand, day, severity, payload)
-                VALUES (%s, %s, %s, CURRENT_DATE, 'warning', %s::jsonb)
+                VALUES (%s, %s, %s, CURRENT_DATE, 'warning', %s)
                 RETURNING id;
                 """,
-                (event_type, tag, brand, json.dumps(payload))
+                (event_type, tag, brand, Json(payload))
             )
             new_id = cur.fetchone()[0]
             conn.commit()  # Manual commit required
@@ -145,7 +144,7 @@ def upsert_confidence_score(
                     acceleration_score, intent_score, spread_score,
                     final_confidence, band, scoring_version, details
                 )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'v1', %s::jsonb)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'v1', %s)
                 ON CONFLICT (day, tag, brand, scoring_version)
                 DO UPDATE SET
                     acceleration_score = EXCLUDED.acceleration_score,
@@ -162,11 +161,56 @@ def upsert_confidence_score(
                 scores["spread"],
                 scores["final"],
                 scores["band"],
-                json.dumps(scores)
+                Json(scores)
             ))
             conn.commit()
 
 
+def upsert_confidence_scores(rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert or update many confidence scores in one statement.
+
+    Pattern: execute_values + ON CONFLICT ... DO UPDATE, single commit.
+    Each row needs day, tag, brand and scores (as for upsert_confidence_score);
+    a (day, tag, brand) may appear only once per call, since one statement
+    cannot update the same row twice.
+    """
+    if not rows:
+        return
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO eva_confidence_v1 (
+                    day, tag, brand,
+                    acceleration_score, intent_score, spread_score,
+                    final_confidence, band, scoring_version, details
+                )
+                VALUES %s
+                ON CONFLICT (day, tag, brand, scoring_version)
+                DO UPDATE SET
+                    acceleration_score = EXCLUDED.acceleration_score,
+                    intent_score = EXCLUDED.intent_score,
+                    spread_score = EXCLUDED.spread_score,
+                    final_confidence = EXCLUDED.final_confidence,
+                    band = EXCLUDED.band,
+                    details = EXCLUDED.details,
+                    computed_at = NOW();
+            """, [
+                (
+                    row["day"], row["tag"], row["brand"],
+                    row["scores"]["acceleration"],
+                    row["scores"]["intent"],
+                    row["scores"]["spread"],
+                    row["scores"]["final"],
+                    row["scores"]["band"],
+                    Json(row["scores"])
+                )
+                for row in rows
+            ], template="(%s, %s, %s, %s, %s, %s, %s, %s, 'v1', %s)", page_size=1000)
+            conn.commit()
+
+
 # ------------------------------------
 # Atomic Claim with FOR UPDATE SKIP LOCKED
 # ------------------------------------
@@ -198,18 +242,21 @@ def claim_pending_notifications(limit: int = 10) -> List[Dict[str, Any]]:
                 FOR UPDATE SKIP LOCKED
             """, (limit,))
 
-            return [dict(row) for row in cur.fetchall()]
+            # RealDictRow is already a dict; no need to copy each row
+            return cur.fetchall()
 
 
 # ------------------------------------
-# Batch Insert with executemany
+# Batch Insert with execute_values
 # ------------------------------------
 def insert_raw_posts(posts: List[Dict[str, Any]]) -> int:
     """
     Insert multiple posts efficiently.
 
-    Pattern: executemany for batch operations.
-    Note: Still use ON CONFLICT for idempotency.
+    Pattern: execute_values sends multi-row INSERT ... VALUES pages
+    (executemany is one round-trip per row).
+    Note: Still use ON CONFLICT for idempotency; count RETURNING rows,
+    since rowcount only covers the last page.
     """
     if not posts:
         return 0
@@ -229,19 +276,23 @@ def insert_raw_posts(posts: List[Dict[str, Any]]) -> int:
                 for post in posts
             ]
 
-            # Use INSERT ... ON CONFLICT for each
-            cur.executemany(
+            # One multi-row INSERT ... ON CONFLICT per 1000 posts
+            inserted = execute_values(
+                cur,
                 """
                 INSERT INTO raw_messages (source, platform_id, timestamp, text, url, meta)
-                VALUES (%s, %s, %s, %s, %s, %s)
+                VALUES %s
                 ON CONFLICT (source, platform_id) DO NOTHING
+                RETURNING id
                 """,
-                data
+                data,
+                template="(%s, %s, %s, %s, %s, %s)",
+                page_size=1000,
+                fetch=True
             )
 
-            inserted = cur.rowcount
             conn.commit()
-            return inserted
+            return len(inserted)
 
 
 # ------------------------------------
@@ -95,6 +95,21 @@ if __name__ == "__main__":
     )
     print("IntakeMessage:", intake.model_dump_json(indent=2))
 
+    # Example: Trusted construction (skips validation)
+    # Only for dicts our own code already shaped, e.g. the output of
+    # RedditPostProcessor.normalize_to_eva_format. Anything arriving over
+    # HTTP (POST /intake/message) must still go through validation.
+    normalized = {
+        "source": "reddit",
+        "platform_id": "reddit_post_def456",
+        "timestamp": "2026-01-15T11:00:00+00:00",
+        "text": "Hoka Clifton 9 review after 300 miles",
+        "url": "https://www.reddit.com/r/running/comments/def456",
+        "meta": {"subreddit": "running", "author": "miler", "reddit_id": "def456"},
+    }
+    trusted = IntakeMessage.model_construct(**normalized)
+    print("\nIntakeMessage (model_construct):", trusted.model_dump_json(indent=2))
+
     # Example: Creating a ProcessedMessage
     processed = ProcessedMessage(
         raw_id=1,
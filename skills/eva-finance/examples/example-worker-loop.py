@@ -14,6 +14,8 @@ import json
 import logging
 from typing import Dict, Any
 
+from psycopg2.extras import execute_values
+
 from eva_common.db import get_connection
 from eva_common.config import app_settings
 
@@ -33,9 +35,10 @@ def process_batch(limit: int = 20) -> int:
     Process a batch of unprocessed messages.
 
     Pattern highlights:
-    1. Query for unprocessed rows (processed = FALSE)
-    2. Process each row individually
-    3. Mark as processed on success
+    1. Claim unprocessed rows with FOR UPDATE SKIP LOCKED (safe to run
+       several workers concurrently)
+    2. Extract each row individually
+    3. Write all results with one INSERT and one UPDATE, single commit
     4. Return count of processed items
 
     Args:
@@ -44,68 +47,65 @@ def process_batch(limit: int = 20) -> int:
     Returns:
         Number of successfully processed rows
     """
-    # 1) Fetch unprocessed rows
+    # One connection for the whole batch: the row locks taken by the
+    # SELECT are held until the final commit
     with get_connection() as conn:
         with conn.cursor() as cur:
+            # 1) Claim unprocessed rows. FOR UPDATE SKIP LOCKED lets several
+            # workers run side by side, each claiming a disjoint set of rows
             cur.execute(
                 """
                 SELECT id, text
                 FROM raw_messages
                 WHERE processed = FALSE
                 ORDER BY id ASC
-                LIMIT %s;
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED;
                 """,
                 (limit,),
             )
             rows = cur.fetchall()
 
-    if not rows:
-        return 0
-
-    # 2) Process each row
-    count = 0
-    for raw_id, text in rows:
-        try:
-            # Extract data from text (LLM or fallback)
-            data = extract_data(raw_id, text)
-
-            with get_connection() as conn:
-                with conn.cursor() as cur:
-                    # Insert processed row
-                    cur.execute(
-                        """
-                        INSERT INTO processed_messages
-                          (raw_id, brand, product, category, sentiment, intent, tickers, tags)
-                        VALUES
-                          (%s, %s, %s, %s, %s, %s, %s, %s)
-                        RETURNING id;
-                        """,
-                        (
-                            data["raw_id"],
-                            data["brand"],
-                            data["product"],
-                            data["category"],
-                            data["sentiment"],
-                            data["intent"],
-                            data["tickers"],
-                            data["tags"],
-                        ),
-                    )
-
-                    # Mark raw as processed
-                    cur.execute(
-                        "UPDATE raw_messages SET processed = TRUE WHERE id = %s;",
-                        (raw_id,),
-                    )
-
-                    conn.commit()
-
-            count += 1
-
-        except Exception as e:
-            logger.error(f"[EVA-WORKER] Failed processing raw_id={raw_id}: {e}")
+            if not rows:
+                return 0
+
+            # 2) Extract each row (LLM or fallback)
+            processed_rows = []
+            for raw_id, text in rows:
+                try:
+                    data = extract_data(raw_id, text)
+                    processed_rows.append((
+                        data["raw_id"],
+                        data["brand"],
+                        data["product"],
+                        data["category"],
+                        data["sentiment"],
+                        data["intent"],
+                        data["tickers"],
+                        data["tags"],
+                    ))
+                except Exception as e:
+                    logger.error(f"[EVA-WORKER] Failed processing raw_id={raw_id}: {e}")
+
+            # 3) Insert processed rows and mark raws as processed; the
+            # commit also releases the claim on any rows that failed
+            if processed_rows:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO processed_messages
+                      (raw_id, brand, product, category, sentiment, intent, tickers, tags)
+                    VALUES %s;
+                    """,
+                    processed_rows,
+                )
+                cur.execute(
+                    "UPDATE raw_messages SET processed = TRUE WHERE id = ANY(%s);",
+                    ([row[0] for row in processed_rows],),
+                )
+            conn.commit()
 
-    return count
+    return len(processed_rows)
 
 
 def extract_data(raw_id: int, text: str) -> Dict[str, Any]:
@@ -169,7 +169,7 @@ def poll_and_notify() -> Dict[str, int]:
     1. SELECT ... FOR UPDATE SKIP LOCKED (atomic claim)
     2. Process in batch with individual error handling
     3. Track stats (sent/failed counts)
-    4. Single commit at end
+    4. One bulk UPDATE per outcome, single commit at end
 
     Source: eva_worker/eva_worker/notify.py
 
@@ -209,7 +209,9 @@ def poll_and_notify() -> Dict[str, int]:
 
                 logger.info(f"[EVA-NOTIFY] Found {len(pending)} pending notifications")
 
-                # Process each notification
+                # Send each notification, recording the outcome per draft
+                success_ids = []
+                failures = []
                 for rec in pending:
                     draft_id = rec["id"]
 
@@ -217,34 +219,37 @@ def poll_and_notify() -> Dict[str, int]:
                         # Send notification (placeholder)
                         send_notification(rec)
 
-                        # Mark as notified (success)
-                        cur.execute("""
-                            UPDATE recommendation_drafts
-                            SET
-                                notified_at = NOW(),
-                                notify_attempts = notify_attempts + 1,
-                                last_notify_error = NULL
-                            WHERE id = %s
-                        """, (draft_id,))
-
+                        success_ids.append(draft_id)
                         logger.info(f"[EVA-NOTIFY] ✓ Sent notification for draft_id={draft_id}")
                         stats["sent"] += 1
 
                     except Exception as e:
                         # Record failure
-                        error_msg = str(e)[:500]
+                        failures.append((draft_id, str(e)[:500]))
                         logger.error(f"[EVA-NOTIFY] ✗ Failed draft_id={draft_id}: {e}")
-
-                        cur.execute("""
-                            UPDATE recommendation_drafts
-                            SET
-                                notify_attempts = notify_attempts + 1,
-                                last_notify_error = %s
-                            WHERE id = %s
-                        """, (error_msg, draft_id))
-
                         stats["failed"] += 1
 
+                # One UPDATE per outcome instead of one per draft
+                if success_ids:
+                    cur.execute("""
+                        UPDATE recommendation_drafts
+                        SET
+                            notified_at = NOW(),
+                            notify_attempts = notify_attempts + 1,
+                            last_notify_error = NULL
+                        WHERE id = ANY(%s)
+                    """, (success_ids,))
+
+                if failures:
+                    execute_values(cur, """
+                        UPDATE recommendation_drafts AS d
+                        SET
+                            notify_attempts = d.notify_attempts + 1,
+                            last_notify_error = v.err
+                        FROM (VALUES %s) AS v(id, err)
+                        WHERE d.id = v.id
+                    """, failures)
+
                 # Single commit for all updates
                 conn.commit()
 
@@ -271,7 +276,7 @@ def main():
     1. Continuous while True loop
     2. Multiple tasks with different intervals
     3. Time-based conditional execution
-    4. Graceful sleep between iterations
+    4. Sleep between iterations only once the queue is drained
     """
     logger.info("[EVA-WORKER] Starting up...")
 
@@ -303,7 +308,11 @@ def main():
             finally:
                 last_notification_poll = current_time
 
-        # Sleep between iterations
+        # A full batch means more rows are likely pending: skip the sleep
+        if n >= 20:
+            continue
+
+        # Sleep between iterations (queue drained)
         time.sleep(10)
 
 
@@ -12,6 +12,8 @@ ENABLED = os.getenv('AI_INFRA_ENABLED', 'false').lower() == 'true'
 # Worker settings
 LOOP_INTERVAL_SECONDS = 15 * 60  # 15 minutes
 POSTS_PER_SUBREDDIT = 50
+FETCH_WORKERS = 4  # subreddits fetched concurrently per loop
+SEEN_POST_CACHE_SIZE = 10_000  # post_ids remembered to skip known duplicates
 
 # Reddit public API settings (no authentication required)
 USER_AGENT = "EVA-Finance/1.0 (AI Infrastructure Monitor; boring and deterministic)"
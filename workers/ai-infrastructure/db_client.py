@@ -1,15 +1,26 @@
+import logging
+from collections import OrderedDict
+
 import psycopg2
+from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import execute_values
 from contextlib import contextmanager
-from config import DATABASE_URL
+from config import DATABASE_URL, SEEN_POST_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
 
 
 class DatabaseClient:
     def __init__(self):
         self.database_url = DATABASE_URL
+        # Long-lived connections, reused across loops instead of connect/close per call
+        self._pool = SimpleConnectionPool(1, 4, self.database_url)
+        # Recently attempted post_ids (LRU); /new.json repeats heavily between polls
+        self._seen = OrderedDict()
 
     @contextmanager
     def get_connection(self):
-        conn = psycopg2.connect(self.database_url)
+        conn = self._pool.getconn()
         try:
             yield conn
             conn.commit()
@@ -17,7 +28,11 @@ class DatabaseClient:
             conn.rollback()
             raise e
         finally:
-            conn.close()
+            self._pool.putconn(conn)
+
+    def close(self):
+        """Close all pooled connections (call on worker shutdown)"""
+        self._pool.closeall()
 
     def get_active_subreddits(self):
         """Load active subreddit list"""
@@ -28,6 +43,20 @@ class DatabaseClient:
                 )
                 return [row[0] for row in cur.fetchall()]
 
+    def load_recent_post_ids(self):
+        """Seed the seen-post LRU from the newest stored posts, return how many were loaded"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT post_id FROM ai_infrastructure_raw_posts ORDER BY id DESC LIMIT %s",
+                    (SEEN_POST_CACHE_SIZE,)
+                )
+                post_ids = [row[0] for row in cur.fetchall()]
+
+        # Oldest first, so the LRU evicts them in insertion order
+        self._remember(reversed(post_ids))
+        return len(post_ids)
+
     def insert_raw_post(self, post):
         """Insert raw post, return True if new, False if duplicate"""
         try:
@@ -53,5 +82,49 @@ class DatabaseClient:
             # Duplicate post_id, skip silently
             return False
         except Exception as e:
-            print(f"Error inserting post {post['id']}: {e}")
+            logger.error(f"Error inserting post {post['id']}: {e}")
             return False
+
+    def insert_raw_posts_batch(self, posts):
+        """Insert a batch of raw posts in one statement, return post_ids that were new"""
+        posts = [post for post in posts if post['id'] not in self._seen]
+        if not posts:
+            return []
+
+        rows = [
+            (
+                post['id'],
+                post['subreddit'],
+                post['title'],
+                post['body'],
+                post['author'],
+                post['score'],
+                post['num_comments'],
+                post['created_utc'],
+                post['url']
+            )
+            for post in posts
+        ]
+
+        # Duplicates are skipped by ON CONFLICT; RETURNING only yields new rows
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                inserted = execute_values(cur, """
+                    INSERT INTO ai_infrastructure_raw_posts
+                    (post_id, subreddit, title, body, author, score, num_comments, created_utc, url)
+                    VALUES %s
+                    ON CONFLICT (post_id) DO NOTHING
+                    RETURNING post_id
+                """, rows, page_size=100, fetch=True)
+                new_ids = [row[0] for row in inserted]
+
+        self._remember(post['id'] for post in posts)
+        return new_ids
+
+    def _remember(self, post_ids):
+        """Record post_ids as seen, evicting the oldest past SEEN_POST_CACHE_SIZE"""
+        for post_id in post_ids:
+            self._seen[post_id] = None
+            self._seen.move_to_end(post_id)
+        while len(self._seen) > SEEN_POST_CACHE_SIZE:
+            self._seen.popitem(last=False)
@@ -1,74 +1,149 @@
+import logging
+import logging.handlers
+import queue
+import random
+import threading
 import time
-from datetime import datetime
-from config import ENABLED, LOOP_INTERVAL_SECONDS, POSTS_PER_SUBREDDIT
-from reddit_client import RedditClient
-from db_client import DatabaseClient
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import ENABLED, LOOP_INTERVAL_SECONDS, POSTS_PER_SUBREDDIT, FETCH_WORKERS
+
+logger = logging.getLogger("ai_infra")
+
+# reddit_client and db_client (psycopg2) are imported only once the kill
+# switch has passed, so a disabled worker idles without loading them
+
+# One RedditClient per fetch thread so each keeps its own rate limiter; all
+# of them are also listed so their connections can be closed on shutdown
+_thread_local = threading.local()
+_reddit_clients = []
+_reddit_clients_lock = threading.Lock()
+
+
+def setup_logging():
+    """
+    Route all log records through a queue drained by a background thread.
+
+    Fetch threads only enqueue records, so they never contend on the stdout
+    lock. Returns the started QueueListener; stop it on shutdown to flush.
+    """
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    return listener
+
+
+def fetch_subreddit(subreddit):
+    """Fetch recent posts for one subreddit using this thread's RedditClient"""
+    reddit = getattr(_thread_local, 'reddit', None)
+    if reddit is None:
+        from reddit_client import RedditClient
+        reddit = _thread_local.reddit = RedditClient()
+        with _reddit_clients_lock:
+            _reddit_clients.append(reddit)
+
+    # Small jitter so the workers don't hit Reddit in lockstep
+    time.sleep(random.uniform(0, 0.5))
+    return reddit.fetch_recent_posts(subreddit, limit=POSTS_PER_SUBREDDIT)
 
 
 def main():
+    listener = setup_logging()
+
     # Kill switch check
     if not ENABLED:
-        print("=" * 60)
-        print("AI Infrastructure Worker is DISABLED")
-        print("Set AI_INFRA_ENABLED=true in docker-compose.yml to activate")
-        print("=" * 60)
+        logger.info("=" * 60)
+        logger.info("AI Infrastructure Worker is DISABLED")
+        logger.info("Set AI_INFRA_ENABLED=true in docker-compose.yml to activate")
+        logger.info("=" * 60)
         while True:
             time.sleep(3600)  # Sleep forever
 
-    print("=" * 60)
-    print("AI Infrastructure Raw Ingestion STARTING")
-    print(f"Timestamp: {datetime.now()}")
-    print("Mode: RAW INGESTION ONLY (no LLM extraction)")
-    print("=" * 60)
-
-    # Initialize clients
-    reddit = RedditClient()
-    db = DatabaseClient()
-
-    # Load configuration
-    subreddits = db.get_active_subreddits()
-    print(f"Monitoring {len(subreddits)} subreddits: {', '.join(subreddits)}")
-    print(f"Fetching {POSTS_PER_SUBREDDIT} posts per subreddit")
-    print(f"Loop interval: {LOOP_INTERVAL_SECONDS}s ({LOOP_INTERVAL_SECONDS/60:.0f} minutes)")
-    print()
-
-    # Main ingestion loop
-    loop_count = 0
-    while True:
-        loop_count += 1
-        loop_start = time.time()
-        print(f"[{datetime.now()}] Loop #{loop_count} starting...")
-
-        total_new = 0
-        total_skipped = 0
-
-        for subreddit in subreddits:
-            try:
-                print(f"  Fetching r/{subreddit}...")
-                posts = reddit.fetch_recent_posts(subreddit, limit=POSTS_PER_SUBREDDIT)
-
-                new_count = 0
-                for post in posts:
-                    inserted = db.insert_raw_post(post)
-                    if inserted:
-                        new_count += 1
-                        total_new += 1
-                    else:
-                        total_skipped += 1
-
-                print(f"    ✓ {len(posts)} posts fetched, {new_count} new, {len(posts)-new_count} duplicates")
-
-            except Exception as e:
-                print(f"    ✗ ERROR: {e}")
-                continue
-
-        loop_duration = time.time() - loop_start
-        print(f"  Loop complete: {total_new} new posts, {total_skipped} duplicates")
-        print(f"  Duration: {loop_duration:.1f}s")
-        print()
-
-        print(f"  Next loop in {LOOP_INTERVAL_SECONDS}s ({LOOP_INTERVAL_SECONDS/60:.0f} minutes)...")
-        time.sleep(LOOP_INTERVAL_SECONDS)
+    logger.info("=" * 60)
+    logger.info("AI Infrastructure Raw Ingestion STARTING")
+    logger.info("Mode: RAW INGESTION ONLY (no LLM extraction)")
+    logger.info("=" * 60)
+
+    db = None
+    executor = None
+    try:
+        from db_client import DatabaseClient
+
+        # Initialize clients
+        db = DatabaseClient()
+
+        # Load configuration
+        subreddits = db.get_active_subreddits()
+        logger.info(f"Monitoring {len(subreddits)} subreddits: {', '.join(subreddits)}")
+        # Restore dedup context so the first loop after a restart skips known posts
+        logger.info(f"Loaded {db.load_recent_post_ids()} recent post_ids for dedup")
+        logger.info(f"Fetching {POSTS_PER_SUBREDDIT} posts per subreddit ({FETCH_WORKERS} in parallel)")
+        logger.info(f"Loop interval: {LOOP_INTERVAL_SECONDS}s ({LOOP_INTERVAL_SECONDS/60:.0f} minutes)")
+
+        # Created once so fetch threads, and the HTTPS connection each one's
+        # RedditClient holds, are reused across loops
+        executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+
+        # Main ingestion loop
+        loop_count = 0
+        while True:
+            loop_count += 1
+            loop_start = time.time()
+            logger.info(f"Loop #{loop_count} starting...")
+
+            total_new = 0
+            total_skipped = 0
+
+            futures = {
+                executor.submit(fetch_subreddit, subreddit): subreddit
+                for subreddit in subreddits
+            }
+
+            # Insert each batch as soon as its fetch completes
+            for future in as_completed(futures):
+                subreddit = futures[future]
+                try:
+                    posts = future.result()
+
+                    new_ids = db.insert_raw_posts_batch(posts)
+                    new_count = len(new_ids)
+                    total_new += new_count
+                    total_skipped += len(posts) - new_count
+
+                    logger.info(f"r/{subreddit}: ✓ {len(posts)} posts fetched, {new_count} new, {len(posts)-new_count} duplicates")
+
+                except Exception as e:
+                    logger.error(f"r/{subreddit}: ✗ ERROR: {e}")
+                    continue
+
+            loop_duration = time.time() - loop_start
+            logger.info(f"Loop complete: {total_new} new posts, {total_skipped} duplicates")
+            logger.info(f"Duration: {loop_duration:.1f}s")
+
+            # Wake on a fixed schedule: loops start LOOP_INTERVAL_SECONDS apart
+            # rather than drifting by each loop's own duration
+            sleep_seconds = max(0.0, LOOP_INTERVAL_SECONDS - loop_duration)
+            logger.info(f"Next loop in {sleep_seconds:.0f}s ({sleep_seconds/60:.0f} minutes)...")
+            time.sleep(sleep_seconds)
+
+    except Exception:
+        logger.exception("Fatal error in AI infrastructure worker")
+        raise
+
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for reddit in _reddit_clients:
+            reddit.close()
+        if db is not None:
+            db.close()
+        # Flush queued log records, including the fatal error above
+        listener.stop()
 
 
 if __name__ == '__main__':
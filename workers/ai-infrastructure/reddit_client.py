@@ -4,18 +4,57 @@ Reddit client using public JSON API (no authentication required).
 Matches the method used by eva_ingest/reddit_posts.py for consistency.
 """
 import json
+import logging
 import time
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from http.client import HTTPSConnection, HTTPException, RemoteDisconnected
 
 from config import USER_AGENT, RATE_LIMIT_SLEEP
 
+REDDIT_HOST = "www.reddit.com"
+NEW_POSTS_PATH = "/r/{}/new.json?limit={}"
+
+# Raised when reddit.com has already dropped an idle keep-alive connection
+STALE_CONNECTION_ERRORS = (RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+logger = logging.getLogger(__name__)
+
 
 class RedditClient:
     """Fetches posts from Reddit's public JSON API with rate limiting."""
 
     def __init__(self):
         self.last_request_time = 0.0
+        # Kept open between requests so TCP/TLS setup is paid once, not per fetch
+        self._conn = HTTPSConnection(REDDIT_HOST, timeout=30)
+        self._headers = {"User-Agent": USER_AGENT}
+
+    def close(self):
+        """Close the persistent connection to reddit.com"""
+        self._conn.close()
+
+    def _get(self, path):
+        """
+        GET a path on the persistent connection and read the full response.
+
+        The connection sits idle between worker loops and reddit.com closes it
+        on its side, so the first request after a gap can fail on a socket
+        that is already dead. That request is retried once on a fresh
+        connection.
+
+        Returns:
+            Tuple of (response, payload bytes)
+        """
+        for attempt in range(2):
+            try:
+                self._conn.request("GET", path, headers=self._headers)
+                response = self._conn.getresponse()
+                # Read the body even on errors so the connection can be reused
+                return response, response.read()
+            except STALE_CONNECTION_ERRORS:
+                self._conn.close()
+                if attempt:
+                    raise
+                logger.debug("Reddit connection went stale; reconnecting")
 
     def fetch_recent_posts(self, subreddit_name, limit=50):
         """
@@ -34,45 +73,49 @@ class RedditClient:
             sleep_time = RATE_LIMIT_SLEEP - elapsed
             time.sleep(sleep_time)
 
-        url = f"https://www.reddit.com/r/{subreddit_name}/new.json?limit={limit}"
-
-        request = Request(url, headers={"User-Agent": USER_AGENT})
+        path = NEW_POSTS_PATH.format(subreddit_name, limit)
 
         try:
-            with urlopen(request, timeout=30) as response:
-                self.last_request_time = time.time()
-                data = json.loads(response.read().decode("utf-8"))
-
-                if not data or "data" not in data or "children" not in data["data"]:
-                    print(f"Unexpected response structure from r/{subreddit_name}")
-                    return []
-
-                posts = []
-                for child in data["data"]["children"]:
-                    post_data = child["data"]
-                    posts.append({
-                        'id': post_data.get("id", ""),
-                        'title': post_data.get("title", ""),
-                        'body': post_data.get("selftext", ""),
-                        'author': post_data.get("author", ""),
-                        'subreddit': subreddit_name,
-                        'created_utc': post_data.get("created_utc", 0),
-                        'url': post_data.get("url", ""),
-                        'score': post_data.get("score", 0),
-                        'num_comments': post_data.get("num_comments", 0)
-                    })
-
-                return posts
-
-        except HTTPError as e:
-            print(f"HTTP error fetching r/{subreddit_name}: {e.code} {e.reason}")
-            return []
-        except URLError as e:
-            print(f"Network error fetching r/{subreddit_name}: {e.reason}")
+            response, payload = self._get(path)
+            self.last_request_time = time.time()
+
+            if response.status != 200:
+                logger.warning(f"HTTP error fetching r/{subreddit_name}: {response.status} {response.reason}")
+                return []
+
+            # json.loads takes bytes directly; no intermediate str copy
+            data = json.loads(payload)
+
+            if not data or "data" not in data or "children" not in data["data"]:
+                logger.warning(f"Unexpected response structure from r/{subreddit_name}")
+                return []
+
+            posts = []
+            for child in data["data"]["children"]:
+                post_data = child["data"]
+                posts.append({
+                    'id': post_data.get("id", ""),
+                    'title': post_data.get("title", ""),
+                    'body': post_data.get("selftext", ""),
+                    'author': post_data.get("author", ""),
+                    'subreddit': subreddit_name,
+                    'created_utc': post_data.get("created_utc", 0),
+                    'url': post_data.get("url", ""),
+                    'score': post_data.get("score", 0),
+                    'num_comments': post_data.get("num_comments", 0)
+                })
+
+            return posts
+
+        except (HTTPException, OSError) as e:
+            # Drop the broken connection; the next request reconnects
+            self._conn.close()
+            logger.warning(f"Network error fetching r/{subreddit_name}: {e}")
             return []
         except json.JSONDecodeError as e:
-            print(f"JSON decode error for r/{subreddit_name}: {e}")
+            logger.warning(f"JSON decode error for r/{subreddit_name}: {e}")
             return []
         except Exception as e:
-            print(f"Error fetching posts from r/{subreddit_name}: {e}")
+            self._conn.close()
+            logger.error(f"Error fetching posts from r/{subreddit_name}: {e}")
             return []